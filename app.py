@@ -1,11 +1,50 @@
 import streamlit as st
-import pandas as pd
 import datetime
 import random
-import google.generativeai as genai
-from datetime import date, timedelta
-import numpy as np
+import importlib
 import os
+import json
+import uuid
+import functools
+import contextlib
+import sys
+import html
+import math
+import re
+import zlib
+import collections
+import concurrent.futures
+import time
+import hashlib
+import hmac
+import socket
+import atexit
+import secrets
+import threading
+import sqlite3
+import dataclasses
+import urllib.error
+import urllib.parse
+import urllib.request
+
+
+class LazyModule:
+    # Stands in for a heavy module and imports it on first attribute access,
+    # so the app starts without paying for pandas, numpy or the Gemini SDK
+    # until a view actually needs them
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+pd = LazyModule("pandas")
+np = LazyModule("numpy")
+genai = LazyModule("google.generativeai")
 
 # ----------------------------
 # 🎨 Page Config
@@ -17,370 +56,3043 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+# ----------------------------
+# ⏱️ Stage Latency Metrics
+# ----------------------------
+# Every instrumented stage keeps Prometheus-style cumulative buckets for
+# export and a window of recent samples for p50/p95/p99 in the admin panel
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+LATENCY_WINDOW = 2048
+LATENCY_PERCENTILES = (50, 95, 99)
+METRICS_EXPORT_SECONDS = 15
+# Every worker labels its series and writes its own file, so workers sharing
+# a host never overwrite each other's figures; METRICS_FILE may use {worker}
+WORKER_ID = f"{socket.gethostname()}-{os.getpid()}"
+DEFAULT_METRICS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "metrics-{worker}.prom")
+
+
+class StageHistogram:
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS_MS)
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.recent = collections.deque(maxlen=LATENCY_WINDOW)
+
+    def observe(self, ms, ok=True):
+        self.count += 1
+        self.total_ms += ms
+        self.errors += 0 if ok else 1
+        self.recent.append(ms)
+        for index, bound in enumerate(LATENCY_BUCKETS_MS):
+            if ms <= bound:
+                self.buckets[index] += 1
+                break
+
+
+class LatencyMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._exporter = None
+        self.export_path = None
+
+    def observe(self, stage, ms, ok=True):
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = StageHistogram()
+            histogram.observe(ms, ok)
+
+    @contextlib.contextmanager
+    def time(self, stage):
+        started = time.perf_counter()
+        ok = True
+        try:
+            yield
+        except Exception:
+            # Streamlit's rerun/stop signals are BaseExceptions and not failures
+            ok = False
+            raise
+        finally:
+            self.observe(stage, (time.perf_counter() - started) * 1000, ok)
+
+    def snapshot(self):
+        with self._lock:
+            stages = {stage: (histogram.count, histogram.errors, histogram.total_ms, list(histogram.recent)) for stage, histogram in self._stages.items()}
+        rows = {}
+        for stage, (count, errors, total_ms, recent) in sorted(stages.items()):
+            quantiles = np.percentile(recent, LATENCY_PERCENTILES) if recent else [0.0] * len(LATENCY_PERCENTILES)
+            rows[stage] = {
+                "count": count,
+                "errors": errors,
+                "mean_ms": round(total_ms / count, 1) if count else 0.0,
+                **{f"p{q}_ms": round(float(value), 1) for q, value in zip(LATENCY_PERCENTILES, quantiles)},
+            }
+        return rows
+
+    def prometheus_text(self):
+        lines = [
+            "# HELP reliefmate_stage_latency_seconds Time spent in each instrumented stage.",
+            "# TYPE reliefmate_stage_latency_seconds histogram",
+        ]
+        with self._lock:
+            stages = sorted(self._stages.items())
+            for stage, histogram in stages:
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS_MS, histogram.buckets):
+                    cumulative += count
+                    lines.append(f'reliefmate_stage_latency_seconds_bucket{{worker="{WORKER_ID}",stage="{stage}",le="{bound / 1000:g}"}} {cumulative}')
+                lines.append(f'reliefmate_stage_latency_seconds_bucket{{worker="{WORKER_ID}",stage="{stage}",le="+Inf"}} {histogram.count}')
+                lines.append(f'reliefmate_stage_latency_seconds_sum{{worker="{WORKER_ID}",stage="{stage}"}} {histogram.total_ms / 1000:.6f}')
+                lines.append(f'reliefmate_stage_latency_seconds_count{{worker="{WORKER_ID}",stage="{stage}"}} {histogram.count}')
+            lines.append("# HELP reliefmate_stage_errors_total Stage executions that raised.")
+            lines.append("# TYPE reliefmate_stage_errors_total counter")
+            for stage, histogram in stages:
+                lines.append(f'reliefmate_stage_errors_total{{worker="{WORKER_ID}",stage="{stage}"}} {histogram.errors}')
+        return "\n".join(lines) + "\n"
+
+    def write_export(self, path):
+        # Written atomically so a scraper never reads a half-written file
+        temp = f"{path}.tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(temp, path)
+
+    def start_export(self, path, interval=METRICS_EXPORT_SECONDS):
+        with self._lock:
+            if self._exporter is not None or not path:
+                return
+            path = path.format(worker=WORKER_ID)
+            self.export_path = path
+            # A stopped worker's file would otherwise keep reporting frozen figures
+            atexit.register(remove_quietly, path)
+            self._exporter = threading.Thread(target=self._export_loop, args=(path, interval), name="metrics-export", daemon=True)
+        self._exporter.start()
+
+    def _export_loop(self, path, interval):
+        while True:
+            try:
+                self.write_export(path)
+            except OSError:
+                # Read-only deploys still get the in-app panel and download
+                pass
+            time.sleep(interval)
+
+
+def remove_quietly(path):
+    with contextlib.suppress(OSError):
+        os.remove(path)
+
+
+@st.cache_resource(show_spinner=False)
+def get_latency_metrics():
+    return LatencyMetrics()
+
+
+def timed(stage):
+    # The metrics singleton is bound at definition time so the wrapper also
+    # works on dispatcher and feed threads that have no script context
+    metrics = get_latency_metrics()
+    
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with metrics.time(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
 # ----------------------------
 # 🎨 Professional Government-Grade CSS
 # ----------------------------
+# The theme lives in static/reliefmate.css and is minified once per process.
+# It is inlined rather than @imported from /app/static: Streamlit's static
+# route serves .css as text/plain with nosniff, which browsers refuse to apply
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+THEME_SOURCE = os.path.join(STATIC_DIR, "reliefmate.css")
+THEME_MINIFIED = os.path.join(STATIC_DIR, "reliefmate.min.css")
+
+
+def minify_css(css):
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};:,>])\s*", r"\1", css)
+    return css.replace(";}", "}").strip()
+
+
+def build_theme_assets():
+    with open(THEME_SOURCE, encoding="utf-8") as f:
+        minified = minify_css(f.read())
+    try:
+        with open(THEME_MINIFIED, encoding="utf-8") as f:
+            current = f.read()
+    except OSError:
+        current = None
+    if current != minified:
+        with open(THEME_MINIFIED, "w", encoding="utf-8") as f:
+            f.write(minified)
+    return minified
+
+
+@st.cache_resource(show_spinner=False)
+def theme_stylesheet_tag():
+    try:
+        minified = build_theme_assets()
+    except OSError:
+        # Read-only deploys ship the committed minified file
+        with open(THEME_MINIFIED, encoding="utf-8") as f:
+            minified = f.read()
+    return f"<style>{minified}</style>"
+
+
 def inject_custom_css():
-    st.markdown("""
-    <style>
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;600;700&display=swap');
-    
-    /* Global Styles */
-    * {
-        margin: 0;
-        padding: 0;
-        box-sizing: border-box;
-    }
-    
-    .main {
-        padding: 0 !important;
-        background: linear-gradient(180deg, #ffffff 0%, #f8fafc 100%);
-        color: #334155;
-        font-family: 'Inter', sans-serif;
-    }
-    
-    .stApp {
-        background: linear-gradient(180deg, #ffffff 0%, #f8fafc 100%);
-    }
-    
-    /* Header Section - Professional & Clean */
-    .hero-container {
-        background: linear-gradient(135deg, #0891b2 0%, #0e7490 100%);
-        padding: 40px 40px 32px 40px;
-        text-align: left;
-        border-bottom: 2px solid #06b6d4;
-        margin-bottom: 48px;
-    }
-    
-    .hero-title {
-        font-size: 2.2rem;
-        font-weight: 700;
-        margin-bottom: 10px;
-        color: #ffffff;
-        display: flex;
-        align-items: center;
-        gap: 12px;
-    }
-    
-    .hero-subtitle {
-        font-size: 1rem;
-        margin-bottom: 16px;
-        color: #e0f2fe;
-        font-weight: 400;
-    }
-    
-    .status-badge {
-        display: inline-block;
-        background: rgba(236, 253, 245, 0.9);
-        color: #059669;
-        padding: 6px 16px;
-        border-radius: 16px;
-        font-size: 0.85rem;
-        font-weight: 600;
-        border: 1px solid #a7f3d0;
-    }
-    
-    .emergency-info {
-        margin-top: 16px;
-        padding: 12px 16px;
-        background: rgba(0, 0, 0, 0.15);
-        border-radius: 8px;
-        border-left: 3px solid #fbbf24;
-    }
-    
-    /* Professional Cards */
-    .glass-card {
-        background: rgba(255, 255, 255, 0.98) !important;
-        border-radius: 10px !important;
-        border: 1px solid #e2e8f0 !important;
-        padding: 24px !important;
-        margin: 20px 0 !important;
-        box-shadow: 0 1px 3px rgba(0, 0, 0, 0.08) !important;
-        color: #334155 !important;
-        transition: all 0.2s ease !important;
-    }
-    
-    .glass-card:hover {
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1) !important;
-        transform: translateY(-1px) !important;
-    }
-    
-    /* Chat Interface */
-    .chat-container {
-        background: rgba(255, 255, 255, 0.98) !important;
-        border-radius: 10px !important;
-        padding: 24px !important;
-        border: 1px solid #e2e8f0 !important;
-        margin: 24px 0 !important;
-        box-shadow: 0 1px 3px rgba(0, 0, 0, 0.08) !important;
-    }
-    
-    .chat-message {
-        background: #f8fafc;
-        padding: 14px 16px;
-        border-radius: 8px;
-        margin: 10px 0;
-        border-left: 3px solid #06b6d4;
-    }
-    
-    .chat-message strong {
-        color: #0f172a;
-    }
-    
-    /* Professional Buttons */
-    .stButton > button {
-        background: #0891b2 !important;
-        color: white !important;
-        border: none !important;
-        border-radius: 8px !important;
-        padding: 10px 24px !important;
-        font-weight: 600 !important;
-        font-size: 0.95rem !important;
-        transition: all 0.2s ease !important;
-        box-shadow: 0 1px 2px rgba(0, 0, 0, 0.08) !important;
-    }
-    
-    .stButton > button:hover {
-        background: #0e7490 !important;
-        box-shadow: 0 2px 4px rgba(0, 0, 0, 0.12) !important;
-        transform: translateY(-1px) !important;
-    }
-    
-    /* Text Input */
-    .stTextInput > div > div > input,
-    .stTextArea > div > div > textarea {
-        background: white !important;
-        border: 1px solid #cbd5e1 !important;
-        border-radius: 8px !important;
-        color: #1e293b !important;
-        padding: 12px !important;
-        font-size: 1rem !important;
-    }
-    
-    .stTextInput > div > div > input:focus,
-    .stTextArea > div > div > textarea:focus {
-        border-color: #06b6d4 !important;
-        box-shadow: 0 0 0 3px rgba(6, 182, 212, 0.1) !important;
-    }
-    
-    .stSelectbox > div > div {
-        background: white !important;
-        border: 1px solid #cbd5e1 !important;
-        border-radius: 8px !important;
-    }
-    
-    /* Metrics */
-    .metric-container {
-        background: rgba(255, 255, 255, 0.98);
-        border-radius: 10px;
-        padding: 20px;
-        text-align: center;
-        border: 1px solid #e2e8f0;
-        box-shadow: 0 1px 3px rgba(0, 0, 0, 0.08);
-        transition: all 0.2s ease;
-    }
-    
-    .metric-container:hover {
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-        transform: translateY(-1px);
-    }
-    
-    .metric-value {
-        font-size: 2.2rem;
-        font-weight: 700;
-        color: #0f172a;
-        margin-bottom: 6px;
-    }
-    
-    .metric-label {
-        font-size: 0.875rem;
-        color: #64748b;
-        font-weight: 500;
-    }
-    
-    /* Tab styling */
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 10px;
-        background: transparent;
-        border-bottom: none;
-        padding-bottom: 0;
-        margin-bottom: 32px;
-    }
-    
-    .stTabs [data-baseweb="tab"] {
-        background: #f1f5f9;
-        border-radius: 20px;
-        color: #64748b;
-        padding: 10px 24px;
-        font-weight: 600;
-        border: 1px solid #e2e8f0;
-        font-size: 0.95rem;
-    }
-    
-    .stTabs [aria-selected="true"] {
-        background: #0891b2 !important;
-        color: white !important;
-        border: 1px solid #0891b2 !important;
-        box-shadow: 0 2px 4px rgba(8, 145, 178, 0.2) !important;
-    }
-    
-    /* Hide Streamlit branding */
-    #MainMenu {visibility: hidden;}
-    footer {visibility: hidden;}
-    header {visibility: hidden;}
-    
-    /* Improved spacing */
-    .block-container {
-        padding-top: 2rem;
-        padding-bottom: 3rem;
-        max-width: 1400px;
-    }
-    
-    h1, h2, h3 {
-        color: #0f172a;
-        font-weight: 700;
-    }
-    
-    h2 {
-        margin-bottom: 8px;
-    }
-    
-    p, label {
-        color: #475569;
-    }
-    
-    /* Status badges */
-    .status-critical {
-        background: #fef2f2;
-        color: #dc2626;
-        padding: 4px 12px;
-        border-radius: 12px;
-        font-weight: 600;
-        font-size: 0.85rem;
-        border: 1px solid #fecaca;
-    }
-    
-    .status-active {
-        background: #fef3c7;
-        color: #d97706;
-        padding: 4px 12px;
-        border-radius: 12px;
-        font-weight: 600;
-        font-size: 0.85rem;
-        border: 1px solid #fde68a;
+    st.markdown(theme_stylesheet_tag(), unsafe_allow_html=True)
+
+# ----------------------------
+# 🔑 Gemini API Setup - FIXED VERSION
+# ----------------------------
+DEFAULT_GEMINI_MODEL = "gemini-1.5-flash"
+PLACEHOLDER_GEMINI_KEY = "your_actual_gemini_api_key_here"
+
+
+def read_setting(name, default=None, cast=str):
+    # Secrets take precedence, environment variables are the local fallback
+    try:
+        value = st.secrets["general"].get(name)
+    except (KeyError, FileNotFoundError):
+        value = None
+    if value in (None, "", PLACEHOLDER_GEMINI_KEY):
+        value = os.environ.get(name)
+    if value in (None, ""):
+        return default
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def read_gemini_settings():
+    return read_setting("GEMINI_API_KEY"), read_setting("GEMINI_MODEL", DEFAULT_GEMINI_MODEL)
+
+
+class GeminiClient:
+    # One configured model per process, shared by every session and rerun
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fingerprint = None
+        self.model = None
+        self.model_name = None
+        self.status = "⚠️ Demo Mode (Add real GEMINI_API_KEY to secrets)"
+        self.healthy = False
+        self.last_error = None
+        self.created_at = None
+        self.failures = 0
+
+    def ensure(self, api_key, model_name):
+        fingerprint = hashlib.sha256(f"{api_key}:{model_name}".encode()).hexdigest()
+        if fingerprint == self._fingerprint:
+            return self.model, self.status
+        with self._lock:
+            if fingerprint != self._fingerprint:
+                self._build(api_key, model_name, fingerprint)
+        return self.model, self.status
+
+    def _build(self, api_key, model_name, fingerprint):
+        # The fingerprint is published last: ensure() reads it without the
+        # lock, so it must never match before model and status are in place
+        model, healthy, last_error = None, False, None
+        status = "⚠️ Demo Mode (Add real GEMINI_API_KEY to secrets)"
+        if api_key:
+            try:
+                genai.configure(api_key=api_key)
+                model = genai.GenerativeModel(model_name)
+                healthy = True
+                status = "✅ Gemini AI Connected"
+            except Exception as e:
+                last_error = str(e)
+                status = f"❌ API Error: {str(e)[:50]}..."
+        self.model = model
+        self.status = status
+        self.healthy = healthy
+        self.last_error = last_error
+        self.model_name = model_name
+        self.created_at = datetime.datetime.now()
+        self.failures = 0
+        self._fingerprint = fingerprint
+
+    @property
+    def fingerprint(self):
+        return self._fingerprint
+
+    def invalidate(self):
+        # Forces the next ensure() to reconfigure, e.g. after a key rotation
+        with self._lock:
+            self._fingerprint = None
+            self.model = None
+            self.healthy = False
+
+    def record_success(self):
+        self.failures = 0
+        self.healthy = self.model is not None
+        self.last_error = None
+        if self.healthy:
+            self.status = "✅ Gemini AI Connected"
+
+    def record_failure(self, error):
+        self.failures += 1
+        self.healthy = False
+        self.last_error = str(error)
+        self.status = f"⚠️ Gemini AI Degraded ({self.failures} failed calls)"
+
+
+@st.cache_resource(show_spinner=False)
+def get_gemini_client():
+    return GeminiClient()
+
+
+@timed("setup_gemini")
+def setup_gemini():
+    api_key, model_name = read_gemini_settings()
+    if not api_key:
+        st.warning("Gemini API key not found in secrets.toml")
+    return get_gemini_client().ensure(api_key, model_name)
+
+# ----------------------------
+# 📊 Sample Data Generation
+# ----------------------------
+SAMPLE_REPORTS = [
+    {"location": "Rajkot", "type": "Flood", "status": "Critical", "needs": "Food, Water, Medical Supplies", "team": "Team A"},
+    {"location": "Ahmedabad", "type": "Earthquake", "status": "Resolved", "needs": "Search & Rescue Complete", "team": "Team B"},
+    {"location": "Surat", "type": "Cyclone", "status": "Active", "needs": "Evacuation, Shelter", "team": "Team C"},
+    {"location": "Bhavnagar", "type": "Fire", "status": "Critical", "needs": "Fire Brigade, Medical Aid", "team": "Team D"},
+    {"location": "Vadodara", "type": "Landslide", "status": "Monitoring", "needs": "Geological Survey", "team": "Team E"}
+]
+
+# City centroids, used when a report only carries a city name
+CITY_COORDINATES = {
+    "Rajkot": (22.3039, 70.8022),
+    "Ahmedabad": (23.0225, 72.5714),
+    "Surat": (21.1702, 72.8311),
+    "Bhavnagar": (21.7645, 72.1519),
+    "Vadodara": (22.3072, 73.1812),
+}
+
+SAMPLE_FACILITIES = [
+    {"name": "Rajkot Civil Hospital", "kind": "hospital", "location": "Rajkot", "latitude": 22.2946, "longitude": 70.7937, "capacity": 1200},
+    {"name": "Rajkot Community Relief Shelter", "kind": "shelter", "location": "Rajkot", "latitude": 22.3119, "longitude": 70.8180, "capacity": 400},
+    {"name": "Ahmedabad Civil Hospital", "kind": "hospital", "location": "Ahmedabad", "latitude": 23.0530, "longitude": 72.6030, "capacity": 2000},
+    {"name": "Ahmedabad Riverfront Relief Centre", "kind": "relief_center", "location": "Ahmedabad", "latitude": 23.0300, "longitude": 72.5800, "capacity": 600},
+    {"name": "Surat New Civil Hospital", "kind": "hospital", "location": "Surat", "latitude": 21.1800, "longitude": 72.8200, "capacity": 1500},
+    {"name": "Surat Coastal Cyclone Shelter", "kind": "shelter", "location": "Surat", "latitude": 21.0800, "longitude": 72.7100, "capacity": 800},
+    {"name": "Bhavnagar Sir T. Hospital", "kind": "hospital", "location": "Bhavnagar", "latitude": 21.7700, "longitude": 72.1400, "capacity": 900},
+    {"name": "Bhavnagar Relief Distribution Centre", "kind": "relief_center", "location": "Bhavnagar", "latitude": 21.7600, "longitude": 72.1600, "capacity": 300},
+    {"name": "Vadodara SSG Hospital", "kind": "hospital", "location": "Vadodara", "latitude": 22.3110, "longitude": 73.1900, "capacity": 1600},
+    {"name": "Vadodara School Shelter", "kind": "shelter", "location": "Vadodara", "latitude": 22.3000, "longitude": 73.1700, "capacity": 350},
+]
+
+# ----------------------------
+# 🗄️ Report Store
+# ----------------------------
+REPORT_STATUSES = ["Critical", "Active", "Resolved", "Monitoring"]
+DEFAULT_REPORTS_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "reliefmate.db")
+
+
+@dataclasses.dataclass
+class Report:
+    location: str
+    type: str
+    status: str
+    needs: str = ""
+    team: str = "Unassigned"
+    description: str = ""
+    category: str = ""
+    latitude: float = None
+    longitude: float = None
+    id: int = None
+    created_at: float = None
+    updated_at: float = None
+    resolved_at: float = None
+    source_id: str = None
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(**{key: row[key] for key in row.keys()})
+
+
+REPORT_COLUMNS = [field.name for field in dataclasses.fields(Report) if field.name != "id"]
+
+
+@dataclasses.dataclass
+class Facility:
+    name: str
+    kind: str
+    location: str
+    latitude: float
+    longitude: float
+    capacity: int = 0
+    status: str = "open"
+    id: int = None
+    updated_at: float = None
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(**{key: row[key] for key in row.keys()})
+
+
+FACILITY_KINDS = {"shelter": "🏠 Shelter", "hospital": "🏥 Hospital", "relief_center": "📦 Relief Centre"}
+FACILITY_COLUMNS = [field.name for field in dataclasses.fields(Facility) if field.name != "id"]
+
+# Materialised counters kept in step with the reports table by triggers.
+# Each dimension maps to the SQL expression that yields its key for a row.
+COUNTER_DIMENSIONS = {
+    "status": "{row}.status",
+    "type": "{row}.type",
+    "location": "{row}.location",
+    "status_type": "{row}.status || '|' || {row}.type",
+    "status_location": "{row}.status || '|' || {row}.location",
+    "status_type_location": "{row}.status || '|' || {row}.type || '|' || {row}.location",
+    # Days are Asia/Kolkata calendar days (ANALYTICS_TIMEZONE, no DST)
+    "created_day": "date({row}.created_at, 'unixepoch', '+5 hours', '+30 minutes')",
+    "resolved_day": "date({row}.resolved_at, 'unixepoch', '+5 hours', '+30 minutes')",
+}
+COUNTER_TRIGGERS = ["trg_reports_counters_insert", "trg_reports_counters_update", "trg_reports_counters_delete"]
+
+
+def counter_statements(row, delta):
+    return "\n".join(
+        f"""INSERT INTO report_counters (dimension, key, count)
+                    SELECT '{dimension}', {expression.format(row=row)}, {delta} WHERE {expression.format(row=row)} IS NOT NULL
+                    ON CONFLICT (dimension, key) DO UPDATE SET count = count + excluded.count;"""
+        for dimension, expression in COUNTER_DIMENSIONS.items()
+    )
+
+
+def stamp_report(report, now):
+    if report.latitude is None and report.location in CITY_COORDINATES:
+        report.latitude, report.longitude = CITY_COORDINATES[report.location]
+    report.created_at = report.created_at or now
+    report.updated_at = report.updated_at or report.resolved_at or report.created_at
+    if report.status == "Resolved" and report.resolved_at is None:
+        report.resolved_at = report.updated_at
+
+
+# Columns added after the first release, applied to existing databases on open
+REPORT_MIGRATIONS = {
+    "resolved_at": "REAL",
+    "category": "TEXT NOT NULL DEFAULT ''",
+    "latitude": "REAL",
+    "longitude": "REAL",
+    "source_id": "TEXT",
+}
+
+# Fields a feed item may change on a report it already delivered
+FEED_UPDATABLE_COLUMNS = ["status", "needs", "team", "description"]
+
+
+class ReportStore:
+    # SQLite in WAL mode so many sessions can read while a writer appends;
+    # each thread gets its own connection
+    def __init__(self, path=DEFAULT_REPORTS_DB):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        with self._write_lock:
+            conn = self._connect()
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS reports (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    location TEXT NOT NULL,
+                    type TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    needs TEXT NOT NULL DEFAULT '',
+                    team TEXT NOT NULL DEFAULT 'Unassigned',
+                    description TEXT NOT NULL DEFAULT '',
+                    category TEXT NOT NULL DEFAULT '',
+                    latitude REAL,
+                    longitude REAL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    resolved_at REAL
+                );
+                CREATE INDEX IF NOT EXISTS idx_reports_location ON reports (location);
+                CREATE INDEX IF NOT EXISTS idx_reports_type ON reports (type);
+                CREATE INDEX IF NOT EXISTS idx_reports_status ON reports (status);
+                CREATE INDEX IF NOT EXISTS idx_reports_updated_at ON reports (updated_at);
+            """)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(reports)")}
+            for column, definition in REPORT_MIGRATIONS.items():
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE reports ADD COLUMN {column} {definition}")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_reports_created_at ON reports (created_at)")
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_reports_source_id ON reports (source_id)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS facilities (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    location TEXT NOT NULL,
+                    latitude REAL NOT NULL,
+                    longitude REAL NOT NULL,
+                    capacity INTEGER NOT NULL DEFAULT 0,
+                    status TEXT NOT NULL DEFAULT 'open',
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_facilities_kind ON facilities (kind)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS bulletins (
+                    source TEXT PRIMARY KEY,
+                    version TEXT NOT NULL,
+                    bulletin TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.commit()
+            needs_backfill = self._create_counters(conn)
+        if needs_backfill:
+            # Databases created before the counters existed need one backfill
+            self.rebuild_counters()
+
+    def _create_counters(self, conn):
+        # Returns True when the counters need a backfill: a new table, or
+        # triggers from an older COUNTER_DIMENSIONS that keyed rows differently
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'report_counters'").fetchone()
+        insert_sql = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = ?", (COUNTER_TRIGGERS[0],)).fetchone()
+        stale = insert_sql is not None and counter_statements("NEW", 1) not in insert_sql[0]
+        if stale:
+            for trigger in COUNTER_TRIGGERS:
+                conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS report_counters (
+                dimension TEXT NOT NULL,
+                key TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (dimension, key)
+            ) WITHOUT ROWID;
+            CREATE TRIGGER IF NOT EXISTS trg_reports_counters_insert AFTER INSERT ON reports BEGIN
+                {counter_statements("NEW", 1)}
+            END;
+            CREATE TRIGGER IF NOT EXISTS trg_reports_counters_update
+            AFTER UPDATE OF status, type, location, created_at, resolved_at ON reports BEGIN
+                {counter_statements("OLD", -1)}
+                {counter_statements("NEW", 1)}
+            END;
+            CREATE TRIGGER IF NOT EXISTS trg_reports_counters_delete AFTER DELETE ON reports BEGIN
+                {counter_statements("OLD", -1)}
+            END;
+        """)
+        return not exists or stale
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add(self, report):
+        return self.add_many([report])[0]
+
+    def add_many(self, reports):
+        now = time.time()
+        ids = []
+        with self._write_lock:
+            conn = self._connect()
+            with conn:
+                for report in reports:
+                    stamp_report(report, now)
+                    cursor = conn.execute(
+                        f"INSERT INTO reports ({', '.join(REPORT_COLUMNS)}) VALUES ({', '.join('?' for _ in REPORT_COLUMNS)})",
+                        [getattr(report, column) for column in REPORT_COLUMNS],
+                    )
+                    report.id = cursor.lastrowid
+                    ids.append(report.id)
+        return ids
+
+    def bulk_add(self, reports):
+        # executemany without per-row id lookups, for large imports
+        now = time.time()
+        rows = []
+        for report in reports:
+            stamp_report(report, now)
+            rows.append([getattr(report, column) for column in REPORT_COLUMNS])
+        with self._write_lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    f"INSERT INTO reports ({', '.join(REPORT_COLUMNS)}) VALUES ({', '.join('?' for _ in REPORT_COLUMNS)})",
+                    rows,
+                )
+        return len(rows)
+
+    def update_status(self, report_id, status):
+        with self._write_lock:
+            conn = self._connect()
+            with conn:
+                now = time.time()
+                conn.execute(
+                    "UPDATE reports SET status = ?, updated_at = ?, resolved_at = CASE WHEN ? = 'Resolved' THEN COALESCE(resolved_at, ?) ELSE NULL END WHERE id = ?",
+                    (status, now, status, now, report_id),
+                )
+
+    def apply_feed(self, reports):
+        # Upserts feed items by source_id: new ids are inserted, known ids are
+        # updated only when a tracked field changed. Returns the changed ids.
+        now = time.time()
+        result = {"inserted": [], "updated": [], "unchanged": 0}
+        with self._write_lock:
+            conn = self._connect()
+            with conn:
+                for report in reports:
+                    existing = conn.execute(
+                        f"SELECT id, {', '.join(FEED_UPDATABLE_COLUMNS)} FROM reports WHERE source_id = ?", (report.source_id,)
+                    ).fetchone()
+                    if existing is None:
+                        stamp_report(report, now)
+                        cursor = conn.execute(
+                            f"INSERT INTO reports ({', '.join(REPORT_COLUMNS)}) VALUES ({', '.join('?' for _ in REPORT_COLUMNS)})",
+                            [getattr(report, column) for column in REPORT_COLUMNS],
+                        )
+                        result["inserted"].append(cursor.lastrowid)
+                        continue
+                    changes = {column: getattr(report, column) for column in FEED_UPDATABLE_COLUMNS if getattr(report, column) != existing[column]}
+                    if not changes:
+                        result["unchanged"] += 1
+                        continue
+                    # SET expressions see the old row, so the new status is passed in
+                    updated_at = report.updated_at or now
+                    conn.execute(
+                        f"UPDATE reports SET {', '.join(f'{column} = ?' for column in changes)}, updated_at = ?, "
+                        "resolved_at = CASE WHEN ? = 'Resolved' THEN COALESCE(resolved_at, ?) ELSE NULL END WHERE id = ?",
+                        [*changes.values(), updated_at, report.status, updated_at, existing["id"]],
+                    )
+                    result["updated"].append(existing["id"])
+        return result
+
+    def set_categories(self, assignments):
+        with self._write_lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany("UPDATE reports SET category = ? WHERE id = ?", [(category, report_id) for report_id, category in assignments])
+
+    def uncategorized(self, limit=500):
+        rows = self._connect().execute(
+            "SELECT * FROM reports WHERE category = '' ORDER BY id LIMIT ?", (limit,)
+        ).fetchall()
+        return [Report.from_row(row) for row in rows]
+
+    def add_facilities(self, facilities):
+        now = time.time()
+        with self._write_lock:
+            conn = self._connect()
+            with conn:
+                for facility in facilities:
+                    facility.updated_at = facility.updated_at or now
+                conn.executemany(
+                    f"INSERT INTO facilities ({', '.join(FACILITY_COLUMNS)}) VALUES ({', '.join('?' for _ in FACILITY_COLUMNS)})",
+                    [[getattr(facility, column) for column in FACILITY_COLUMNS] for facility in facilities],
+                )
+
+    def facilities(self):
+        return [Facility.from_row(row) for row in self._connect().execute("SELECT * FROM facilities ORDER BY id")]
+
+    def facility_version(self):
+        return tuple(self._connect().execute("SELECT COUNT(*), MAX(updated_at) FROM facilities").fetchone())
+
+    def located_reports(self):
+        return pd.read_sql_query(
+            "SELECT id, location, type, status, latitude, longitude FROM reports WHERE latitude IS NOT NULL AND status != 'Resolved'",
+            self._connect(),
+        )
+
+    def get_bulletin(self, source, version):
+        row = self._connect().execute("SELECT bulletin FROM bulletins WHERE source = ? AND version = ?", (source, version)).fetchone()
+        return row[0] if row else None
+
+    def save_bulletin(self, source, version, bulletin):
+        with self._write_lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT INTO bulletins (source, version, bulletin, created_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (source) DO UPDATE SET version = excluded.version, bulletin = excluded.bulletin, created_at = excluded.created_at",
+                    (source, version, bulletin, time.time()),
+                )
+
+    def get(self, report_id):
+        row = self._connect().execute("SELECT * FROM reports WHERE id = ?", (report_id,)).fetchone()
+        return Report.from_row(row) if row else None
+
+    @staticmethod
+    def _where(status=None, disaster_type=None, location=None):
+        clauses, params = [], []
+        for column, value in (("status", status), ("type", disaster_type), ("location", location)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, status=None, disaster_type=None, location=None, page=1, page_size=20):
+        where, params = self._where(status, disaster_type, location)
+        rows = self._connect().execute(
+            f"SELECT * FROM reports{where} ORDER BY updated_at DESC, id DESC LIMIT ? OFFSET ?",
+            params + [page_size, (max(page, 1) - 1) * page_size],
+        ).fetchall()
+        return [Report.from_row(row) for row in rows]
+
+    def count(self, status=None, disaster_type=None, location=None):
+        where, params = self._where(status, disaster_type, location)
+        return self._connect().execute(f"SELECT COUNT(*) FROM reports{where}", params).fetchone()[0]
+
+    def counters(self, dimension):
+        if dimension not in COUNTER_DIMENSIONS:
+            raise ValueError(f"Unknown counter dimension: {dimension}")
+        rows = self._connect().execute(
+            "SELECT key, count FROM report_counters WHERE dimension = ? AND count > 0 ORDER BY key", (dimension,)
+        ).fetchall()
+        return {key: count for key, count in rows}
+
+    def day_totals(self, dimension, days):
+        # Per-day counts for the given YYYY-MM-DD keys, plus the running total
+        # up to and including each day; reads one counter row per day on record
+        counts = self.counters(dimension)
+        keys = np.array(list(counts), dtype=str)
+        running = np.concatenate([[0], np.cumsum(list(counts.values()), dtype=np.int64)])
+        return [counts.get(day, 0) for day in days], running[np.searchsorted(keys, days, side="right")]
+
+    def status_counts(self, disaster_type=None, location=None):
+        # Point lookups on the counters' primary key, never a reports scan
+        if not disaster_type and not location:
+            return self.counters("status")
+        dimension = "status" + ("_type" if disaster_type else "") + ("_location" if location else "")
+        suffix = "".join(f"|{value}" for value in (disaster_type, location) if value)
+        keys = {f"{status}{suffix}": status for status in REPORT_STATUSES}
+        rows = self._connect().execute(
+            f"SELECT key, count FROM report_counters WHERE dimension = ? AND key IN ({', '.join('?' for _ in keys)}) AND count > 0",
+            [dimension, *keys],
+        ).fetchall()
+        return {keys[key]: count for key, count in rows}
+
+    def distinct(self, column):
+        if column not in ("location", "type", "status"):
+            raise ValueError(f"Unknown report column: {column}")
+        return list(self.counters(column))
+
+    def total(self):
+        return sum(self.counters("status").values())
+
+    def rebuild_counters(self):
+        # Recomputes every counter from the reports table and returns the
+        # entries that had drifted, for consistency checks
+        selects = " UNION ALL ".join(
+            f"SELECT '{dimension}' AS dimension, {expression.format(row='reports')} AS key FROM reports"
+            for dimension, expression in COUNTER_DIMENSIONS.items()
+        )
+        with self._write_lock:
+            conn = self._connect()
+            with conn:
+                before = {(d, k): c for d, k, c in conn.execute("SELECT dimension, key, count FROM report_counters WHERE count != 0")}
+                conn.execute("DELETE FROM report_counters")
+                conn.execute(
+                    f"INSERT INTO report_counters (dimension, key, count) SELECT dimension, key, COUNT(*) FROM ({selects}) WHERE key IS NOT NULL GROUP BY dimension, key"
+                )
+                after = {(d, k): c for d, k, c in conn.execute("SELECT dimension, key, count FROM report_counters")}
+        return {key: (before.get(key, 0), after.get(key, 0)) for key in before.keys() | after.keys() if before.get(key, 0) != after.get(key, 0)}
+
+    def data_version(self):
+        # Cheap change marker for caches: the counter total plus an indexed MAX
+        return self.total(), self._connect().execute("SELECT MAX(updated_at) FROM reports").fetchone()[0]
+
+    def load_frame(self, since, columns=("created_at", "resolved_at", "status", "type", "location", "team")):
+        return pd.read_sql_query(
+            f"SELECT {', '.join(columns)} FROM reports WHERE created_at >= ? OR resolved_at >= ? OR resolved_at IS NULL",
+            self._connect(), params=(since, since),
+        )
+
+    def seed_if_empty(self, samples):
+        if self.total() == 0:
+            self.add_many([Report(**sample) for sample in samples])
+
+
+# Reports are deliberately outside STATE_BACKEND: the store is single-host
+# SQLite, shared by the workers of one machine only (see the README)
+@st.cache_resource(show_spinner=False)
+def get_report_store():
+    store = ReportStore(read_setting("REPORTS_DB_PATH", DEFAULT_REPORTS_DB))
+    store.seed_if_empty(SAMPLE_REPORTS)
+    if store.facility_version()[0] == 0:
+        store.add_facilities([Facility(**facility) for facility in SAMPLE_FACILITIES])
+    return store
+
+# ----------------------------
+# 🗃️ Shared State Backend
+# ----------------------------
+# With STATE_BACKEND set, chat sessions, conversation memory and the
+# response/translation caches live in a store every worker process can reach,
+# so a browser that reconnects to a different worker picks up where it left
+# off. "sqlite:///path/state.db" works for workers on one host; a
+# "redis://host:6379/0" URL needs the optional redis package.
+# Unset, everything stays in process memory as before.
+STATE_KEY_PREFIX = "reliefmate"
+STATE_PURGE_EVERY = 500
+
+
+class SQLiteStateBackend:
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS state (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL,
+                PRIMARY KEY (namespace, key)
+            ) WITHOUT ROWID
+        """)
+        conn.commit()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Several processes write this file, so waits on their locks are expected
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, namespace, key):
+        row = self._connect().execute(
+            "SELECT value FROM state WHERE namespace = ? AND key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (namespace, key, time.time()),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, namespace, key, value, ttl=None):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT INTO state (namespace, key, value, expires_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+                (namespace, key, json.dumps(value), time.time() + ttl if ttl else None),
+            )
+            self._writes += 1
+            if self._writes % STATE_PURGE_EVERY == 0:
+                conn.execute("DELETE FROM state WHERE expires_at <= ?", (time.time(),))
+
+    def delete(self, namespace, key):
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM state WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def setdefault(self, namespace, key, value):
+        # Stores value unless the key exists and returns whichever value won
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT INTO state (namespace, key, value) VALUES (?, ?, ?) ON CONFLICT (namespace, key) DO NOTHING",
+                (namespace, key, json.dumps(value)),
+            )
+        return self.get(namespace, key)
+
+    def lease(self, name, owner, ttl):
+        # True while this owner holds the named lease; it must be renewed within ttl
+        conn = self._connect()
+        now = time.time()
+        with conn:
+            conn.execute(
+                "INSERT INTO state (namespace, key, value, expires_at) VALUES ('lease', ?, ?, ?) "
+                "ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at "
+                "WHERE state.value = excluded.value OR state.expires_at <= ?",
+                (name, json.dumps(owner), now + ttl, now),
+            )
+        return self.get("lease", name) == owner
+
+
+class RedisStateBackend:
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("STATE_BACKEND points at Redis but the 'redis' package is not installed") from e
+        self.client = redis.Redis.from_url(url)
+
+    @staticmethod
+    def _name(namespace, key):
+        return f"{STATE_KEY_PREFIX}:{namespace}:{key}"
+
+    def get(self, namespace, key):
+        value = self.client.get(self._name(namespace, key))
+        return json.loads(value) if value is not None else None
+
+    def set(self, namespace, key, value, ttl=None):
+        self.client.set(self._name(namespace, key), json.dumps(value), ex=int(math.ceil(ttl)) if ttl else None)
+
+    def delete(self, namespace, key):
+        self.client.delete(self._name(namespace, key))
+
+    def setdefault(self, namespace, key, value):
+        self.client.set(self._name(namespace, key), json.dumps(value), nx=True)
+        return self.get(namespace, key)
+
+    def lease(self, name, owner, ttl):
+        key = self._name("lease", name)
+        if self.client.set(key, owner, nx=True, px=int(ttl * 1000)):
+            return True
+        if self.client.get(key) == owner.encode():
+            self.client.pexpire(key, int(ttl * 1000))
+            return True
+        return False
+
+
+class SharedState:
+    # Shared state only ever speeds things up or carries sessions across
+    # workers: if the backend is unreachable reads miss and writes are dropped
+    # rather than failing the request
+    def __init__(self, backend):
+        self.backend = backend
+        self.errors = 0
+        self.last_error = None
+
+    def _failed(self, error):
+        self.errors += 1
+        self.last_error = str(error)[:120]
+
+    def get(self, namespace, key):
+        try:
+            return self.backend.get(namespace, key)
+        except Exception as e:
+            self._failed(e)
+            return None
+
+    def set(self, namespace, key, value, ttl=None):
+        try:
+            self.backend.set(namespace, key, value, ttl)
+        except Exception as e:
+            self._failed(e)
+
+    def delete(self, namespace, key):
+        try:
+            self.backend.delete(namespace, key)
+        except Exception as e:
+            self._failed(e)
+
+    def setdefault(self, namespace, key, value):
+        try:
+            return self.backend.setdefault(namespace, key, value)
+        except Exception as e:
+            self._failed(e)
+            return value
+
+    def lease(self, name, owner, ttl):
+        # Fails open: duplicate background work is safe, stalled work is not
+        try:
+            return self.backend.lease(name, owner, ttl)
+        except Exception as e:
+            self._failed(e)
+            return True
+
+
+def open_state_backend(url):
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisStateBackend(url)
+    if url.startswith("sqlite:///"):
+        return SQLiteStateBackend(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported STATE_BACKEND: {url}")
+
+
+@st.cache_resource(show_spinner=False)
+def get_state_backend():
+    url = read_setting("STATE_BACKEND")
+    return SharedState(open_state_backend(url)) if url else None
+
+
+# ----------------------------
+# 📈 Analytics Engine
+# ----------------------------
+ANALYTICS_WINDOWS = {"Last 7 days": 7, "Last 30 days": 30, "Last 90 days": 90}
+
+
+def summarize_window(frame, start, end):
+    # Every figure is a vectorised mask/reduction over the frame's columns
+    created = frame["created_at"].to_numpy(dtype="float64")
+    resolved = frame["resolved_at"].to_numpy(dtype="float64", na_value=np.nan)
+    new_mask = (created >= start) & (created < end)
+    resolved_mask = (resolved >= start) & (resolved < end)
+    open_at_end = (created < end) & ~(resolved < end)
+    response_minutes = (resolved[new_mask & resolved_mask] - created[new_mask & resolved_mask]) / 60.0
+    if response_minutes.size:
+        p50, p90, p95 = (float(value) for value in np.percentile(response_minutes, [50, 90, 95]))
+    else:
+        p50 = p90 = p95 = None
+    new_count = int(new_mask.sum())
+    resolved_count = int(resolved_mask.sum())
+    return {
+        "new": new_count,
+        "resolved": resolved_count,
+        "resolution_rate": round(resolved_count / new_count * 100, 1) if new_count else 0.0,
+        "backlog": int(open_at_end.sum()),
+        "critical_open": int((open_at_end & (frame["status"].to_numpy() == "Critical")).sum()),
+        "response_p50": p50,
+        "response_p90": p90,
+        "response_p95": p95,
+        "locations": int(frame.loc[new_mask, "location"].nunique()),
+        "teams": int(frame.loc[open_at_end & (frame["team"] != "Unassigned").to_numpy(), "team"].nunique()),
     }
-    
-    .status-resolved {
-        background: #ecfdf5;
-        color: #059669;
-        padding: 4px 12px;
-        border-radius: 12px;
-        font-weight: 600;
-        font-size: 0.85rem;
-        border: 1px solid #a7f3d0;
+
+
+# Days and hours are bucketed in local time for the responders, not UTC
+ANALYTICS_TIMEZONE = "Asia/Kolkata"
+
+
+# Row-level figures (hourly mix, response percentiles, areas, the previous
+# window) need the reports themselves, so they refresh on a timer; the daily
+# series and headline totals come from the counters on every rerun
+ANALYTICS_ROLLUP_SECONDS = 60
+
+
+def analytics_days(days, now=None):
+    today = pd.Timestamp(now or time.time(), unit="s", tz="UTC").tz_convert(ANALYTICS_TIMEZONE).floor("D")
+    return pd.date_range(end=today, periods=days, freq="D")
+
+
+def counter_analytics(store, days, now=None):
+    days_index = analytics_days(days, now)
+    keys = [day.strftime("%Y-%m-%d") for day in days_index]
+    new_daily, created_total = store.day_totals("created_day", keys)
+    resolved_daily, resolved_total = store.day_totals("resolved_day", keys)
+    # Backlog at the end of each day = everything opened up to it minus everything closed up to it
+    daily = pd.DataFrame({
+        "New Requests": new_daily,
+        "Resolved Cases": resolved_daily,
+        "Active Cases": created_total - resolved_total,
+    }, index=days_index.date)
+    daily.index.name = "Date"
+    new_count, resolved_count = sum(new_daily), sum(resolved_daily)
+    return {
+        "daily": daily,
+        "current": {
+            "new": new_count,
+            "resolved": resolved_count,
+            "resolution_rate": round(resolved_count / new_count * 100, 1) if new_count else 0.0,
+            "backlog": int(created_total[-1] - resolved_total[-1]),
+            "critical_open": store.counters("status").get("Critical", 0),
+        },
     }
-    
-    .status-monitoring {
-        background: #eff6ff;
-        color: #2563eb;
-        padding: 4px 12px;
-        border-radius: 12px;
-        font-weight: 600;
-        font-size: 0.85rem;
-        border: 1px solid #bfdbfe;
+
+
+def compute_analytics(frame, days, now=None):
+    now = now or time.time()
+    window_start = now - days * 86400
+    previous_start = window_start - days * 86400
+    
+    created = pd.to_datetime(frame["created_at"], unit="s", utc=True).dt.tz_convert(ANALYTICS_TIMEZONE)
+    in_window = frame["created_at"] >= window_start
+    hourly = created[in_window].dt.hour.value_counts().reindex(range(24), fill_value=0)
+    hourly.index.name = "Hour"
+    
+    return {
+        "days": days,
+        "hourly": hourly.rename("Requests").to_frame(),
+        "current": summarize_window(frame, window_start, now + 1),
+        "previous": summarize_window(frame, previous_start, window_start),
     }
-    
-    /* Responsive */
-    @media (max-width: 768px) {
-        .hero-title {
-            font-size: 1.8rem;
-        }
-        .hero-subtitle {
-            font-size: 1rem;
+
+
+@st.cache_data(show_spinner=False, ttl=ANALYTICS_ROLLUP_SECONDS, max_entries=16)
+def analytics_for_window(days, _store):
+    return compute_analytics(_store.load_frame(time.time() - 2 * days * 86400), days)
+
+
+# ----------------------------
+# 🗺️ Geospatial Index
+# ----------------------------
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.2
+NEARBY_DEFAULT_K = 3
+
+
+def haversine_km(lat, lon, lats, lons):
+    lat, lon = np.radians(lat), np.radians(lon)
+    lats, lons = np.radians(lats), np.radians(lons)
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class SpatialIndex:
+    # Uniform lat/lon grid stored CSR-style: points are sorted by cell id, so
+    # the cells of one grid row form a contiguous run found with searchsorted
+    def __init__(self, latitudes, longitudes, cell_degrees=0.1):
+        self.lats = np.asarray(latitudes, dtype=np.float64)
+        self.lons = np.asarray(longitudes, dtype=np.float64)
+        self.cell = cell_degrees
+        self.columns = int(math.ceil(360 / cell_degrees)) + 1
+        rows, cols = self._cell(self.lats, self.lons)
+        keys = rows * self.columns + cols
+        self.order = np.argsort(keys, kind="stable")
+        self.keys = keys[self.order]
+
+    def __len__(self):
+        return len(self.lats)
+
+    def _cell(self, lat, lon):
+        return (np.floor((np.asarray(lat) + 90) / self.cell).astype(np.int64),
+                np.floor((np.asarray(lon) + 180) / self.cell).astype(np.int64))
+
+    def _candidates(self, lat, lon, radius_km):
+        lat_span = radius_km / KM_PER_DEGREE
+        lon_span = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+        (row0, col0), (row1, col1) = self._cell(lat - lat_span, lon - lon_span), self._cell(lat + lat_span, lon + lon_span)
+        rows = np.arange(row0, row1 + 1)
+        starts = np.searchsorted(self.keys, rows * self.columns + col0, side="left")
+        ends = np.searchsorted(self.keys, rows * self.columns + col1, side="right")
+        if not len(rows) or not (ends - starts).any():
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([self.order[start:end] for start, end in zip(starts, ends) if end > start])
+
+    def within(self, lat, lon, radius_km, mask=None):
+        # Returns (indices, distances) of points within radius_km, nearest first
+        candidates = self._candidates(lat, lon, radius_km)
+        if mask is not None:
+            candidates = candidates[mask[candidates]]
+        distances = haversine_km(lat, lon, self.lats[candidates], self.lons[candidates])
+        keep = distances <= radius_km
+        order = np.argsort(distances[keep], kind="stable")
+        return candidates[keep][order], distances[keep][order]
+
+    def nearest(self, lat, lon, k=NEARBY_DEFAULT_K, max_km=500.0, mask=None):
+        # Grows the search radius until k points are inside the searched circle
+        radius = max(self.cell * KM_PER_DEGREE, 5.0)
+        while True:
+            indices, distances = self.within(lat, lon, radius, mask)
+            if len(indices) >= k or radius >= max_km:
+                return indices[:k], distances[:k]
+            radius = min(radius * 2, max_km)
+
+
+class FacilityLocator:
+    def __init__(self, facilities):
+        self.facilities = facilities
+        self.index = SpatialIndex([f.latitude for f in facilities], [f.longitude for f in facilities])
+        self.kinds = np.array([f.kind for f in facilities])
+        self.open = np.array([f.status == "open" for f in facilities], dtype=bool)
+
+    def nearest(self, lat, lon, kind=None, k=NEARBY_DEFAULT_K, max_km=500.0, open_only=True):
+        mask = self.open.copy() if open_only else np.ones(len(self.facilities), dtype=bool)
+        if kind:
+            mask &= self.kinds == kind
+        indices, distances = self.index.nearest(lat, lon, k, max_km, mask)
+        return [(self.facilities[i], float(d)) for i, d in zip(indices, distances)]
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_facility_locator(facility_version, _store):
+    # facility_version keys the cache, so edits to facilities rebuild the index
+    return FacilityLocator(_store.facilities())
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_report_locator(data_version, _store):
+    frame = _store.located_reports()
+    return frame, SpatialIndex(frame["latitude"].to_numpy(), frame["longitude"].to_numpy())
+
+
+NEARBY_INTENT = re.compile(r"\b(nearest|nearby|near|closest|where)\b.*\b(shelter|hospital|relief|camp|centre|center)s?\b"
+                           r"|\b(shelter|hospital|relief|camp|centre|center)s?\b.*\b(near|nearest|nearby|closest|in)\b", re.I)
+FACILITY_WORDS = {"shelter": "shelter", "camp": "shelter", "hospital": "hospital", "relief": "relief_center", "centre": "relief_center", "center": "relief_center"}
+
+
+def nearby_facilities_note(question, locator):
+    # Answers "nearest open shelter in Surat" style questions from the local
+    # index so the reply can list real facilities with distances
+    if not NEARBY_INTENT.search(question):
+        return ""
+    lowered = question.lower()
+    city = next((name for name in CITY_COORDINATES if name.lower() in lowered), None)
+    if city is None:
+        return ""
+    kind = next((FACILITY_WORDS[word] for word in FACILITY_WORDS if word in lowered), None)
+    results = locator.nearest(*CITY_COORDINATES[city], kind=kind)
+    if not results:
+        return ""
+    lines = [f"{FACILITY_KINDS.get(f.kind, f.kind)}: **{f.name}** — {d:.1f} km from {city} centre" for f, d in results]
+    return "\n\n📍 **Nearest open facilities**<br>" + "<br>".join(lines)
+
+
+# ----------------------------
+# 📥 Bulk CSV Ingestion
+# ----------------------------
+CSV_CHUNK_SIZE = 5000
+CSV_PREVIEW_ROWS = 100
+CSV_MAX_BAD_ROWS_REPORTED = 100
+CSV_REQUIRED_COLUMNS = ["location", "type", "status"]
+CSV_OPTIONAL_COLUMNS = ["needs", "team", "description", "created_at", "resolved_at", "latitude", "longitude"]
+CSV_TIMESTAMP_COLUMNS = ["created_at", "resolved_at"]
+CSV_COORDINATE_COLUMNS = {"latitude": 90.0, "longitude": 180.0}
+CSV_COLUMN_ALIASES = {"disaster_type": "type", "disaster": "type", "severity": "status", "city": "location", "requirements": "needs", "lat": "latitude", "lon": "longitude", "lng": "longitude"}
+
+
+def normalize_csv_column(name):
+    key = str(name).strip().lower().replace(" ", "_")
+    return CSV_COLUMN_ALIASES.get(key, key)
+
+
+def ingest_reports_csv(source, store, chunk_size=CSV_CHUNK_SIZE, on_progress=None):
+    # Streams the CSV in chunks: every chunk is validated with vectorised
+    # checks, its good rows are written to the store and only a small sample
+    # is kept for preview, so memory stays flat regardless of file size
+    started = time.perf_counter()
+    metrics = get_latency_metrics()
+    known = set(CSV_REQUIRED_COLUMNS + CSV_OPTIONAL_COLUMNS)
+    total_bytes = getattr(source, "size", None)
+    result = {"rows_read": 0, "rows_imported": 0, "bad_count": 0, "bad_rows": [], "preview": None}
+    reader = pd.read_csv(
+        source,
+        chunksize=chunk_size,
+        dtype=str,
+        keep_default_na=False,
+        usecols=lambda column: normalize_csv_column(column) in known,
+    )
+    # Parse time per chunk covers reading it and the vectorised validation
+    chunk_started = time.perf_counter()
+    for chunk in reader:
+        normalized = [normalize_csv_column(column) for column in chunk.columns]
+        # e.g. both "city" and "location": the row would have two locations
+        clashes = {name: [original for original, other in zip(chunk.columns, normalized) if other == name]
+                   for name in normalized if normalized.count(name) > 1}
+        if clashes:
+            raise ValueError("Conflicting columns: " + "; ".join(
+                f"{', '.join(originals)} map to '{name}' (keep only one)" for name, originals in clashes.items()))
+        chunk.columns = normalized
+        missing = [column for column in CSV_REQUIRED_COLUMNS if column not in chunk.columns]
+        if missing:
+            raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+        for column in CSV_OPTIONAL_COLUMNS:
+            if column not in chunk.columns:
+                chunk[column] = ""
+        chunk = chunk[CSV_REQUIRED_COLUMNS + CSV_OPTIONAL_COLUMNS].apply(lambda column: column.str.strip())
+        chunk["status"] = chunk["status"].str.title()
+        
+        # Bad rows are reported with the values as uploaded, not the parsed NaN/NaT
+        raw = chunk[CSV_TIMESTAMP_COLUMNS + list(CSV_COORDINATE_COLUMNS)].copy()
+        problems = pd.Series("", index=chunk.index)
+        for column in ("location", "type"):
+            problems = problems.mask((chunk[column] == "") & (problems == ""), f"missing {column}")
+        problems = problems.mask(~chunk["status"].isin(REPORT_STATUSES) & (problems == ""), "unknown status")
+        for column in CSV_TIMESTAMP_COLUMNS:
+            parsed = pd.to_datetime(chunk[column], errors="coerce", utc=True, format="ISO8601")
+            problems = problems.mask(parsed.isna() & (chunk[column] != "") & (problems == ""), f"invalid {column}")
+            chunk[column] = (parsed - pd.Timestamp(0, tz="UTC")) / pd.Timedelta(seconds=1)
+        for column, limit in CSV_COORDINATE_COLUMNS.items():
+            parsed = pd.to_numeric(chunk[column], errors="coerce")
+            problems = problems.mask((chunk[column] != "") & ~parsed.abs().le(limit) & (problems == ""), f"invalid {column}")
+            chunk[column] = parsed
+        bad = problems != ""
+        
+        if bad.any():
+            result["bad_count"] += int(bad.sum())
+            room = CSV_MAX_BAD_ROWS_REPORTED - len(result["bad_rows"])
+            if room > 0:
+                # +2: one for the header row, one because CSV lines are 1-based
+                for index, reason in problems[bad].head(room).items():
+                    result["bad_rows"].append({"line": int(index) + 2, "reason": reason, **chunk.loc[index].to_dict(), **raw.loc[index].to_dict()})
+        good = chunk[~bad]
+        metrics.observe("csv_parse_chunk", (time.perf_counter() - chunk_started) * 1000)
+        if len(good):
+            records = good.astype(object).where(good.notna(), None).to_dict("records")
+            with metrics.time("csv_store_chunk"):
+                store.bulk_add([Report(team=row.pop("team") or "Unassigned", **row) for row in records])
+        if result["preview"] is None:
+            result["preview"] = good.head(CSV_PREVIEW_ROWS).drop(columns=CSV_TIMESTAMP_COLUMNS + list(CSV_COORDINATE_COLUMNS))
+        
+        result["rows_read"] += len(chunk)
+        result["rows_imported"] += len(good)
+        if on_progress is not None:
+            fraction = source.tell() / total_bytes if total_bytes else 0.0
+            on_progress(min(fraction, 1.0), result["rows_read"])
+        chunk_started = time.perf_counter()
+    
+    result["seconds"] = time.perf_counter() - started
+    result["rows_per_sec"] = result["rows_read"] / result["seconds"] if result["seconds"] else 0.0
+    return result
+
+
+# ----------------------------
+# 📡 Live Feed Ingestion
+# ----------------------------
+# Feeds deliver one report object per item with a stable "id"; the same id
+# arriving again with a new status or needs updates the stored report.
+# Local files are tailed as JSON Lines from the last byte offset, HTTP
+# sources are polled with conditional requests (JSON array or JSON Lines).
+FEED_POLL_SECONDS = 10
+FEED_REFRESH_SECONDS = 15
+FEED_HTTP_TIMEOUT = 10
+FEED_SEEN_LIMIT = 50000
+
+
+def parse_feed_timestamp(value):
+    if value in (None, ""):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    parsed = datetime.datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed.timestamp()
+
+
+def parse_feed_item(source_name, item):
+    # Accepts the same field names and aliases as the CSV import
+    fields = {normalize_csv_column(key): value for key, value in item.items()}
+    item_id = fields.get("id") or hashlib.sha1(json.dumps(item, sort_keys=True).encode()).hexdigest()[:16]
+    for column in CSV_REQUIRED_COLUMNS:
+        if not str(fields.get(column) or "").strip():
+            raise ValueError(f"missing {column}")
+    status = str(fields["status"]).strip().title()
+    if status not in REPORT_STATUSES:
+        raise ValueError("unknown status")
+    report = Report(
+        location=str(fields["location"]).strip(),
+        type=str(fields["type"]).strip(),
+        status=status,
+        needs=str(fields.get("needs") or "").strip(),
+        team=str(fields.get("team") or "").strip() or "Unassigned",
+        description=str(fields.get("description") or "").strip(),
+        created_at=parse_feed_timestamp(fields.get("created_at")),
+        updated_at=parse_feed_timestamp(fields.get("updated_at")),
+        source_id=f"{source_name}#{item_id}",
+    )
+    for column, limit in CSV_COORDINATE_COLUMNS.items():
+        if fields.get(column) not in (None, ""):
+            value = float(fields[column])
+            if abs(value) > limit:
+                raise ValueError(f"invalid {column}")
+            setattr(report, column, value)
+    return report
+
+
+def parse_json_lines(data):
+    # A malformed line becomes None and is counted as invalid, not fatal
+    items = []
+    for line in data.splitlines():
+        if line.strip():
+            try:
+                items.append(json.loads(line))
+            except json.JSONDecodeError:
+                items.append(None)
+    return items
+
+
+class FileFeedSource:
+    def __init__(self, path):
+        self.name = os.path.basename(path)
+        self.path = path
+        self.offset = 0
+        self._partial = b""
+
+    def poll(self):
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            return []
+        if size < self.offset:
+            # Truncated or rotated: start again, ids keep replays idempotent
+            self.offset, self._partial = 0, b""
+        if size == self.offset:
+            return []
+        with open(self.path, "rb") as handle:
+            handle.seek(self.offset)
+            data = handle.read(size - self.offset)
+        self.offset += len(data)
+        # An unterminated last line is still being written; keep it for the next poll
+        data, _, self._partial = (self._partial + data).rpartition(b"\n")
+        return parse_json_lines(data.decode("utf-8"))
+
+
+class HttpFeedSource:
+    def __init__(self, url):
+        self.name = urllib.parse.urlsplit(url).netloc or url
+        self.url = url
+        self.etag = None
+        self.last_modified = None
+
+    def poll(self):
+        headers = {"Accept": "application/json"}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        try:
+            with urllib.request.urlopen(urllib.request.Request(self.url, headers=headers), timeout=FEED_HTTP_TIMEOUT) as response:
+                body = response.read().decode("utf-8").strip()
+                self.etag = response.headers.get("ETag")
+                self.last_modified = response.headers.get("Last-Modified")
+        except urllib.error.HTTPError as error:
+            if error.code == 304:
+                return []
+            raise
+        if body.startswith("["):
+            return json.loads(body)
+        return parse_json_lines(body)
+
+
+def feed_source(spec):
+    spec = spec.strip()
+    if spec.startswith(("http://", "https://")):
+        return HttpFeedSource(spec)
+    return FileFeedSource(spec)
+
+
+class FeedIngestor:
+    # Background poller: items already seen with identical content are
+    # dropped in memory, the rest are upserted into the store as deltas
+    def __init__(self, store, sources, interval=FEED_POLL_SECONDS, seen_limit=FEED_SEEN_LIMIT, backend=None):
+        self.store = store
+        self.backend = backend
+        self.owner = uuid.uuid4().hex
+        self.sources = sources
+        self.interval = interval
+        self.seen_limit = seen_limit
+        self._seen = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.stats = {
+            "polls": 0, "items": 0, "duplicates": 0, "inserted": 0, "updated": 0,
+            "invalid": 0, "errors": 0, "last_poll": None, "last_error": None, "leader": True,
         }
-    }
-    </style>
+        self._thread = threading.Thread(target=self._run, name="feed-ingestor", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            # With several workers only the lease holder polls; the others
+            # take over if it stops renewing
+            leader = self.backend is None or self.backend.lease("feed-ingestor", self.owner, self.interval * 3)
+            self.stats["leader"] = leader
+            if leader:
+                self.poll_once()
+            self._stop.wait(self.interval)
+
+    def stop(self):
+        self._stop.set()
+
+    def poll_once(self):
+        for source in self.sources:
+            try:
+                self.ingest(source.name, source.poll())
+            except Exception as error:
+                with self._lock:
+                    self.stats["errors"] += 1
+                    self.stats["last_error"] = f"{source.name}: {error}"
+        with self._lock:
+            self.stats["polls"] += 1
+            self.stats["last_poll"] = time.time()
+
+    def ingest(self, source_name, items):
+        fresh, digests, invalid, duplicates = [], {}, 0, 0
+        for item in items:
+            try:
+                report = parse_feed_item(source_name, item)
+            except (AttributeError, TypeError, ValueError):
+                invalid += 1
+                continue
+            digest = hashlib.sha1(json.dumps(item, sort_keys=True).encode()).hexdigest()
+            if self._seen.get(report.source_id) == digest or digests.get(report.source_id) == digest:
+                duplicates += 1
+                continue
+            digests[report.source_id] = digest
+            fresh.append(report)
+        result = self.store.apply_feed(fresh) if fresh else {"inserted": [], "updated": [], "unchanged": 0}
+        # Only remembered once stored, so a failed write is retried on replay
+        for source_id, digest in digests.items():
+            self._seen[source_id] = digest
+            self._seen.move_to_end(source_id)
+        while len(self._seen) > self.seen_limit:
+            self._seen.popitem(last=False)
+        with self._lock:
+            self.stats["items"] += len(items)
+            self.stats["invalid"] += invalid
+            self.stats["duplicates"] += duplicates + result["unchanged"]
+            self.stats["inserted"] += len(result["inserted"])
+            self.stats["updated"] += len(result["updated"])
+        return result
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats, sources=[source.name for source in self.sources])
+
+
+@st.cache_resource(show_spinner=False)
+def get_feed_ingestor():
+    # FEED_SOURCES: comma-separated JSON Lines file paths and/or HTTP URLs
+    specs = [spec for spec in read_setting("FEED_SOURCES", "").split(",") if spec.strip()]
+    if not specs:
+        return None
+    return FeedIngestor(
+        get_report_store(),
+        [feed_source(spec) for spec in specs],
+        interval=read_setting("FEED_POLL_SECONDS", FEED_POLL_SECONDS, float),
+        backend=get_state_backend(),
+    )
+
+
+def simulate_feed(path, count=50, interval=2.0):
+    # Local stand-in for a live source: appends new reports and status
+    # changes to a JSON Lines file that FEED_SOURCES can point at
+    delivered = {}
+    with open(path, "a", encoding="utf-8") as handle:
+        for _ in range(count):
+            if delivered and random.random() < 0.4:
+                item = dict(random.choice(list(delivered.values())), status=random.choice(REPORT_STATUSES))
+            else:
+                item = dict(random.choice(SAMPLE_REPORTS), id=uuid.uuid4().hex[:12])
+                item["created_at"] = time.time()
+            item["updated_at"] = time.time()
+            delivered[item["id"]] = item
+            handle.write(json.dumps(item) + "\n")
+            handle.flush()
+            time.sleep(interval)
+
+
+def serve_feed(path, port=8765):
+    # Local HTTP stand-in: serves the feed file with Last-Modified support
+    import http.server
+    handler = functools.partial(http.server.SimpleHTTPRequestHandler, directory=os.path.dirname(os.path.abspath(path)))
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", port), handler)
+    print(f"Serving http://127.0.0.1:{port}/{os.path.basename(path)}")
+    server.serve_forever()
+
+
+# ----------------------------
+# 🏠 Hero Section
+# ----------------------------
+@timed("render_hero")
+def render_hero():
+    st.markdown("""
+    <div class="hero-container">
+        <div style="display: flex; justify-content: space-between; align-items: center; flex-wrap: wrap;">
+            <div>
+                <h1 class="hero-title">
+                    <span style="font-size: 1.8rem;">🌍</span> ReliefMate AI
+                </h1>
+                <p class="hero-subtitle">Advanced Disaster Relief Management System</p>
+                <span class="status-badge">System Operational</span>
+            </div>
+        </div>
+        <div class="emergency-info" style="margin-top: 16px;">
+            <strong style="color: #fbbf24;">Emergency Hotlines:</strong>
+            <span style="color: #e5e7eb; margin-left: 16px;">
+                Police: 112  |  Medical: 108  |  Fire: 101
+            </span>
+        </div>
+    </div>
     """, unsafe_allow_html=True)
 
 # ----------------------------
-# 🔑 Gemini API Setup - FIXED VERSION
+# 🧠 Semantic Response Cache
+# ----------------------------
+RESPONSE_CACHE_MAX_ENTRIES = 500
+RESPONSE_CACHE_TTL_SECONDS = 15 * 60
+RESPONSE_CACHE_SIMILARITY = 0.9
+EMBEDDING_DIMENSIONS = 512
+
+# Filler and intent words that do not change which guidance is needed
+QUERY_STOPWORDS = {
+    "a", "about", "advice", "an", "and", "any", "are", "at", "be", "can", "could", "do", "does",
+    "during", "for", "from", "give", "guidance", "happen", "help", "how", "i", "if", "in", "info",
+    "information", "is", "it", "me", "my", "of", "on", "or", "please", "precaution", "should", "safe",
+    "safety", "tell", "the", "there", "tip", "to", "we", "what", "when", "where", "which", "while",
+    "with", "you", "your",
+}
+
+
+def stem_token(token):
+    # Light suffix stripping: "flooding" -> "flood", "fires" -> "fire"
+    for suffix in ("ing", "ed", "s"):
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            return token[:-len(suffix)]
+    return token
+
+
+def normalize_query(text):
+    tokens = re.findall(r"[a-z0-9]+", text.lower())
+    return [stem_token(t) for t in tokens if t not in QUERY_STOPWORDS and stem_token(t) not in QUERY_STOPWORDS]
+
+
+def embed_query(text):
+    # Hashed bag of words plus character trigrams, L2-normalised so a dot
+    # product is the cosine similarity
+    vector = np.zeros(EMBEDDING_DIMENSIONS, dtype=np.float32)
+    tokens = normalize_query(text)
+    for token in tokens:
+        vector[zlib.crc32(token.encode()) % EMBEDDING_DIMENSIONS] += 1.0
+        padded = f"#{token}#"
+        for i in range(len(padded) - 2):
+            vector[zlib.crc32(b"3:" + padded[i:i + 3].encode()) % EMBEDDING_DIMENSIONS] += 0.25
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    return " ".join(sorted(set(tokens))), vector
+
+
+class ResponseCache:
+    # Semantic matching runs on the local entries; with a shared backend an
+    # exact (normalised) miss also checks answers cached by other workers
+    def __init__(self, max_entries=RESPONSE_CACHE_MAX_ENTRIES, ttl_seconds=RESPONSE_CACHE_TTL_SECONDS,
+                 similarity=RESPONSE_CACHE_SIMILARITY, backend=None):
+        self.backend = backend
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity = similarity
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+        self.stats = {"hits": 0, "similar_hits": 0, "shared_hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+    @staticmethod
+    def namespace(template, model_name):
+        return hashlib.sha256(f"{model_name}\n{template}".encode()).hexdigest()[:16]
+
+    @staticmethod
+    def shared_key(namespace, normalized):
+        return f"{namespace}:{hashlib.sha256(normalized.encode()).hexdigest()[:32]}"
+
+    def _store_local(self, key, vector, response, created):
+        self._entries[key] = {"vector": vector, "response": response, "created": created, "hits": 0}
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _expire(self, now):
+        stale = [key for key, entry in self._entries.items() if now - entry["created"] > self.ttl_seconds]
+        for key in stale:
+            del self._entries[key]
+        self.stats["expired"] += len(stale)
+
+    def get(self, question, namespace):
+        normalized, vector = embed_query(question)
+        if not normalized:
+            return None
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            key = (namespace, normalized)
+            entry = self._entries.get(key)
+            if entry is None:
+                candidates = [(k, e) for k, e in self._entries.items() if k[0] == namespace]
+                if candidates:
+                    scores = np.stack([e["vector"] for _, e in candidates]) @ vector
+                    best = int(np.argmax(scores))
+                    if scores[best] >= self.similarity:
+                        key, entry = candidates[best]
+                        self.stats["similar_hits"] += 1
+            if entry is not None:
+                self._entries.move_to_end(key)
+                entry["hits"] += 1
+                self.stats["hits"] += 1
+                return entry["response"]
+        # The shared lookup runs outside the lock, it may be a network call
+        shared = self.backend.get("response", self.shared_key(namespace, normalized)) if self.backend is not None else None
+        with self._lock:
+            if shared is None or now - shared["created"] > self.ttl_seconds:
+                self.stats["misses"] += 1
+                return None
+            self._store_local(key, vector, shared["response"], shared["created"])
+            self._entries[key]["hits"] += 1
+            self.stats["hits"] += 1
+            self.stats["shared_hits"] += 1
+            return shared["response"]
+
+    def put(self, question, namespace, response):
+        normalized, vector = embed_query(question)
+        if not normalized:
+            return
+        created = time.time()
+        with self._lock:
+            self._store_local((namespace, normalized), vector, response, created)
+        if self.backend is not None:
+            self.backend.set("response", self.shared_key(namespace, normalized), {"response": response, "created": created}, ttl=self.ttl_seconds)
+
+    def top_responses(self, limit, min_hits=0):
+        with self._lock:
+            ranked = sorted(self._entries.values(), key=lambda entry: entry["hits"], reverse=True)
+            return [entry["response"] for entry in ranked[:limit] if entry["hits"] >= min_hits]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self):
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return dict(self.stats, entries=len(self._entries), lookups=lookups,
+                        hit_ratio=self.stats["hits"] / lookups if lookups else 0.0)
+
+
+@st.cache_resource(show_spinner=False)
+def get_response_cache():
+    return ResponseCache(backend=get_state_backend())
+
+
+# ----------------------------
+# 🚦 Model Request Dispatcher
+# ----------------------------
+class DispatcherBusy(RuntimeError):
+    pass
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def available(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            return self.tokens
+
+    def refund(self):
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + 1)
+
+
+class DispatchTicket:
+    def __init__(self, dispatcher, key=None, priority="normal"):
+        self._dispatcher = dispatcher
+        self._cond = threading.Condition()
+        self.key = key
+        self.priority = priority
+        self.tag = None
+        self.fn = None
+        self.args = ()
+        self.state = "queued"
+        self.attempts = 0
+        self.streamed = False
+        self.text = None
+        self.version = 0
+        self.waiters = 1
+        self.enqueued_at = time.monotonic()
+        self.future = None
+
+    def emit(self, text):
+        # Called from the worker thread; every waiting session sees the latest text
+        with self._cond:
+            self.streamed = True
+            self.text = text
+            self.version += 1
+            self._cond.notify_all()
+
+    def wake(self, *_):
+        with self._cond:
+            self._cond.notify_all()
+
+    def wait_for_change(self, seen_version, timeout):
+        with self._cond:
+            self._cond.wait_for(lambda: self.version != seen_version or self.future.done(), timeout=timeout)
+            return self.version, self.text
+
+    def position(self):
+        return self._dispatcher.queue_position(self)
+
+
+def is_transient_error(error):
+    message = str(error).lower()
+    return any(marker in message for marker in ("429", "500", "503", "504", "quota", "rate limit", "resource exhausted", "unavailable", "deadline", "timeout"))
+
+
+# Exception class names (anywhere in the MRO) that mean the service or the
+# network path to it is unhealthy; matched by name so the SDKs stay lazy
+UPSTREAM_ERROR_NAMES = {"ServerError", "ResourceExhausted", "TooManyRequests", "DeadlineExceeded", "ServiceUnavailable"}
+TRANSPORT_ERROR_NAMES = {"ConnectionError", "TransportError", "ProtocolError", "NewConnectionError", "ReadTimeoutError", "MaxRetryError", "Timeout"}
+UPSTREAM_GRPC_CODES = {"UNAVAILABLE", "DEADLINE_EXCEEDED", "RESOURCE_EXHAUSTED", "INTERNAL"}
+
+
+def is_upstream_error(error):
+    # Only transport failures, 5xx, rate limiting and deadlines count toward
+    # the breaker. A 4xx such as InvalidArgument comes from one bad request
+    # while the service is healthy, and must not open it for everyone.
+    names = {cls.__name__ for cls in type(error).__mro__}
+    if names & UPSTREAM_ERROR_NAMES:
+        return True
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        # google.api_core errors carry their HTTP status
+        return code >= 500 or code == 429
+    if callable(code) and type(error).__module__.startswith("grpc"):
+        return getattr(code(), "name", "") in UPSTREAM_GRPC_CODES
+    if isinstance(error, (ConnectionError, TimeoutError)) or names & TRANSPORT_ERROR_NAMES:
+        return True
+    return is_transient_error(error)
+
+
+class CircuitOpen(DispatcherBusy):
+    pass
+
+
+class CircuitBreaker:
+    # closed -> open after consecutive failures or consecutive slow calls.
+    # While open every model request is refused at once; after a cooldown a
+    # background probe tests the model (half-open), enough good probes close
+    # the breaker and a bad one re-opens it with a doubled cooldown.
+    def __init__(self, failure_threshold=5, slow_call_ms=20000, slow_call_threshold=3,
+                 cooldown=15.0, max_cooldown=300.0, probes_to_close=2, probe=None):
+        self.failure_threshold = failure_threshold
+        self.slow_call_ms = slow_call_ms
+        self.slow_call_threshold = slow_call_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.probes_to_close = probes_to_close
+        self.probe = probe
+        self._lock = threading.Lock()
+        self._prober = None
+        self.state = "closed"
+        self.cooldown = cooldown
+        self.opened_at = None
+        self.failures = 0
+        self.slow_calls = 0
+        self.probe_successes = 0
+        self.trips = 0
+        self.last_reason = None
+
+    def allow(self):
+        return self.state == "closed"
+
+    def record_success(self, elapsed_ms):
+        with self._lock:
+            # Late results from calls started before a trip do not close it
+            if self.state != "closed":
+                return
+            self.failures = 0
+            if elapsed_ms < self.slow_call_ms:
+                self.slow_calls = 0
+                return
+            self.slow_calls += 1
+            if self.slow_calls >= self.slow_call_threshold:
+                self._trip(f"{self.slow_calls} calls slower than {self.slow_call_ms / 1000:g}s")
+
+    def record_failure(self, error):
+        with self._lock:
+            if self.state != "closed":
+                return
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self._trip(f"{self.failures} consecutive failures: {str(error)[:80]}")
+
+    def _trip(self, reason):
+        self.state = "open"
+        self.opened_at = time.monotonic()
+        self.trips += 1
+        self.last_reason = reason
+        self.probe_successes = 0
+        if self._prober is None:
+            self._prober = threading.Thread(target=self._probe_loop, name="circuit-probe", daemon=True)
+            self._prober.start()
+
+    def _probe_loop(self):
+        while True:
+            with self._lock:
+                if self.state == "closed":
+                    self._prober = None
+                    return
+                wait = self.opened_at + self.cooldown - time.monotonic() if self.state == "open" else 0
+                if wait <= 0:
+                    self.state = "half-open"
+            if wait > 0:
+                time.sleep(min(wait, 1.0))
+                continue
+            started = time.perf_counter()
+            try:
+                self.probe()
+                ok = (time.perf_counter() - started) * 1000 < self.slow_call_ms
+            except Exception as e:
+                ok = False
+                self.last_reason = f"probe failed: {str(e)[:80]}"
+            with self._lock:
+                if not ok:
+                    self.state = "open"
+                    self.opened_at = time.monotonic()
+                    self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+                    self.probe_successes = 0
+                    continue
+                self.probe_successes += 1
+                if self.probe_successes >= self.probes_to_close:
+                    self.state = "closed"
+                    self.failures = self.slow_calls = 0
+                    self.cooldown = self.base_cooldown
+            time.sleep(1.0)
+
+    def retry_in(self):
+        if self.state != "open":
+            return 0
+        return max(0, round(self.opened_at + self.cooldown - time.monotonic()))
+
+    def snapshot(self):
+        with self._lock:
+            return {"state": self.state, "trips": self.trips, "failures": self.failures, "slow_calls": self.slow_calls,
+                    "cooldown": self.cooldown, "retry_in": self.retry_in(), "last_reason": self.last_reason}
+
+
+# Scheduling classes, most urgent first. "critical" is always served first;
+# the rest share capacity by weight (weighted fair queuing), and background
+# work may never take the last free worker
+PRIORITY_CLASSES = ["critical", "high", "normal", "low"]
+PRIORITY_WEIGHTS = {"high": 4, "normal": 2, "low": 1}
+BACKGROUND_PRIORITIES = {"low"}
+# Admin-marked Critical reports join life-threat messages in the strict
+# priority class, ahead of ordinary chat (high)
+SEVERITY_PRIORITIES = {"Critical": "critical", "Active": "normal", "Monitoring": "low", "Resolved": "low"}
+LIFE_THREAT_SIGNALS = re.compile(
+    r"\b(trapped|stuck (?:inside|under|on)|on (?:the |our |my )?roofs?|drowning|swept away|buried|"
+    r"bleeding|unconscious|not breathing|can'?t breathe|heart attack|collapsed on|sos|save us)\b",
+    re.IGNORECASE,
+)
+
+
+def request_priority(text, severity=None, default="high"):
+    # Pre-screens free text for life-threatening situations; otherwise the
+    # admin severity, if any, decides, then the caller's default
+    if LIFE_THREAT_SIGNALS.search(text or ""):
+        return "critical"
+    if severity is not None:
+        return SEVERITY_PRIORITIES.get(severity, "normal")
+    return default
+
+
+class ModelDispatcher:
+    # Shared front door for every upstream model call: bounded concurrency,
+    # a token bucket for the provider rate limit, priority scheduling,
+    # retries and backpressure
+    # Callers catch these through the instance: the dispatcher is cached across
+    # reruns, and each rerun redefines the module-level exception classes
+    Busy = DispatcherBusy
+    CircuitOpen = CircuitOpen
+    
+    def __init__(self, max_in_flight=4, rate_per_second=2.0, burst=4, max_queue=64,
+                 max_retries=3, backoff_base=0.5, backoff_cap=8.0, metrics=None, breaker=None):
+        self.max_in_flight = max_in_flight
+        self.breaker = breaker or CircuitBreaker()
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.metrics = metrics
+        self.bucket = TokenBucket(rate_per_second, burst)
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._queues = {priority: collections.deque() for priority in PRIORITY_CLASSES}
+        self._last_finish = dict.fromkeys(PRIORITY_CLASSES, 0.0)
+        self._virtual_time = 0.0
+        self._background_running = 0
+        # One worker is held back from background classes when there is more than one
+        self.background_limit = max(1, max_in_flight - 1)
+        self._in_flight_keys = {}
+        self.in_flight = 0
+        self.stats = {"submitted": 0, "coalesced": 0, "completed": 0, "failed": 0, "retries": 0, "rejected": 0, "short_circuited": 0, "queue_wait_ms": 0.0}
+        self.class_stats = {priority: {"submitted": 0, "started": 0, "queue_wait_ms": 0.0} for priority in PRIORITY_CLASSES}
+        for index in range(max_in_flight):
+            threading.Thread(target=self._worker, name=f"gemini-{index}", daemon=True).start()
+
+    @property
+    def queued(self):
+        return sum(len(queue) for queue in self._queues.values())
+
+    def _enqueue(self, ticket):
+        # Virtual finish tags: each class advances by 1/weight per request, so
+        # under contention classes are served in proportion to their weights
+        if ticket.priority == "critical":
+            ticket.tag = (0, ticket.enqueued_at)
+        else:
+            finish = max(self._virtual_time, self._last_finish[ticket.priority]) + 1.0 / PRIORITY_WEIGHTS[ticket.priority]
+            self._last_finish[ticket.priority] = finish
+            ticket.tag = (1, finish)
+        self._queues[ticket.priority].append(ticket)
+        self._cond.notify()
+
+    def submit(self, fn, *args, key=None, priority="normal"):
+        if priority not in self._queues:
+            raise ValueError(f"Unknown priority class: {priority}")
+        with self._lock:
+            if not self.breaker.allow():
+                self.stats["short_circuited"] += 1
+                raise CircuitOpen(f"Model circuit is {self.breaker.state}")
+            # Identical requests already in flight share one upstream call; a
+            # more urgent duplicate promotes the queued ticket
+            if key is not None and key in self._in_flight_keys:
+                ticket = self._in_flight_keys[key]
+                ticket.waiters += 1
+                self.stats["coalesced"] += 1
+                if ticket.state == "queued" and PRIORITY_CLASSES.index(priority) < PRIORITY_CLASSES.index(ticket.priority):
+                    self._queues[ticket.priority].remove(ticket)
+                    ticket.priority = priority
+                    self._enqueue(ticket)
+                return ticket
+            # Life-threatening requests are never turned away for lack of queue space
+            if self.queued >= self.max_queue and priority != "critical":
+                self.stats["rejected"] += 1
+                raise DispatcherBusy(f"{self.queued} requests already waiting for the model")
+            ticket = DispatchTicket(self, key, priority)
+            ticket.fn, ticket.args = fn, args
+            ticket.future = concurrent.futures.Future()
+            ticket.future.add_done_callback(ticket.wake)
+            if key is not None:
+                self._in_flight_keys[key] = ticket
+            self.stats["submitted"] += 1
+            self.class_stats[priority]["submitted"] += 1
+            self._enqueue(ticket)
+        return ticket
+
+    def _eligible(self):
+        background_ok = self._background_running < self.background_limit
+        heads = [queue[0] for priority, queue in self._queues.items()
+                 if queue and (background_ok or priority not in BACKGROUND_PRIORITIES)]
+        return min(heads, key=lambda ticket: ticket.tag) if heads else None
+
+    def queue_position(self, ticket):
+        with self._lock:
+            if ticket.state != "queued":
+                return 0
+            return 1 + sum(1 for queue in self._queues.values() for other in queue if other.tag < ticket.tag)
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._eligible() is not None)
+            # The rate-limit token is taken before choosing, so whatever is
+            # most urgent at that moment gets it
+            self.bucket.acquire()
+            with self._cond:
+                ticket = self._eligible()
+                if ticket is None:
+                    self.bucket.refund()
+                    continue
+                self._queues[ticket.priority].popleft()
+                if ticket.tag[0]:
+                    self._virtual_time = ticket.tag[1]
+                if ticket.priority in BACKGROUND_PRIORITIES:
+                    self._background_running += 1
+                self.in_flight += 1
+                wait_ms = (time.monotonic() - ticket.enqueued_at) * 1000
+                self.stats["queue_wait_ms"] += wait_ms
+                self.class_stats[ticket.priority]["started"] += 1
+                self.class_stats[ticket.priority]["queue_wait_ms"] += wait_ms
+                ticket.state = "running"
+            if self.metrics is not None:
+                self.metrics.observe(f"queue_wait_{ticket.priority}", wait_ms)
+            self._run(ticket)
+
+    def _run(self, ticket):
+        started = time.perf_counter()
+        try:
+            while True:
+                # Requests queued before a trip fail fast instead of hitting a sick model
+                if not self.breaker.allow():
+                    self._count("short_circuited")
+                    ticket.future.set_exception(CircuitOpen(f"Model circuit is {self.breaker.state}"))
+                    return
+                ticket.attempts += 1
+                attempt_started = time.perf_counter()
+                try:
+                    result = ticket.fn(*ticket.args, emit=ticket.emit)
+                    self.breaker.record_success((time.perf_counter() - attempt_started) * 1000)
+                    self._count("completed")
+                    ticket.future.set_result(result)
+                    return
+                except Exception as e:
+                    if is_upstream_error(e):
+                        self.breaker.record_failure(e)
+                    # A half-streamed answer cannot be retried without duplicating text
+                    if ticket.streamed or ticket.attempts > self.max_retries or not is_transient_error(e):
+                        self._count("failed")
+                        ticket.future.set_exception(e)
+                        return
+                    self._count("retries")
+                    ticket.state = "retrying"
+                    time.sleep(random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** ticket.attempts)))
+                    self.bucket.acquire()
+                    ticket.state = "running"
+        finally:
+            with self._cond:
+                self.in_flight -= 1
+                if ticket.priority in BACKGROUND_PRIORITIES:
+                    self._background_running -= 1
+                if ticket.key is not None and self._in_flight_keys.get(ticket.key) is ticket:
+                    del self._in_flight_keys[ticket.key]
+                self._cond.notify()
+            ticket.state = "done"
+            if self.metrics is not None:
+                self.metrics.observe(f"model_call_{ticket.priority}", (time.perf_counter() - started) * 1000, ticket.future.exception() is None)
+
+    def wait(self, ticket, on_text=None, on_state=None, poll_interval=0.1):
+        # Runs in the script thread: relays streamed text and state changes to
+        # the UI and returns the worker result (or raises its exception)
+        seen_version = 0
+        last_state = None
+        while True:
+            version, text = ticket.wait_for_change(seen_version, poll_interval)
+            if version != seen_version:
+                seen_version = version
+                if on_text is not None:
+                    on_text(text)
+            if ticket.future.done() and ticket.version == seen_version:
+                return ticket.future.result()
+            state = (ticket.state, ticket.position()) if ticket.state == "queued" else (ticket.state, 0)
+            if on_state is not None and state != last_state and not ticket.streamed:
+                on_state(*state)
+            last_state = state
+
+    def snapshot(self):
+        with self._lock:
+            queued = self.queued
+            started = self.stats["submitted"] - queued
+            classes = {
+                priority: dict(stats, queued=len(self._queues[priority]),
+                               avg_queue_wait_ms=round(stats["queue_wait_ms"] / stats["started"]) if stats["started"] else 0)
+                for priority, stats in self.class_stats.items()
+            }
+            return dict(self.stats, queued=queued, in_flight=self.in_flight,
+                        max_in_flight=self.max_in_flight, tokens=round(self.bucket.available(), 2),
+                        avg_queue_wait_ms=round(self.stats["queue_wait_ms"] / started) if started else 0,
+                        classes=classes)
+
+
+CIRCUIT_PROBE_PROMPT = "Reply with the single word OK."
+
+
+@st.cache_resource(show_spinner=False)
+def get_model_dispatcher():
+    client = get_gemini_client()
+    
+    def probe():
+        if client.model is None:
+            raise RuntimeError("no model configured")
+        dispatcher.bucket.acquire()
+        generate_blocking(client.model, CIRCUIT_PROBE_PROMPT)
+    
+    breaker = CircuitBreaker(
+        failure_threshold=read_setting("GEMINI_BREAKER_FAILURES", 5, int),
+        slow_call_ms=read_setting("GEMINI_BREAKER_SLOW_CALL_MS", 20000, float),
+        slow_call_threshold=read_setting("GEMINI_BREAKER_SLOW_CALLS", 3, int),
+        cooldown=read_setting("GEMINI_BREAKER_COOLDOWN", 15.0, float),
+        probe=probe,
+    )
+    dispatcher = ModelDispatcher(
+        max_in_flight=read_setting("GEMINI_MAX_IN_FLIGHT", 4, int),
+        rate_per_second=read_setting("GEMINI_RATE_PER_SECOND", 2.0, float),
+        burst=read_setting("GEMINI_RATE_BURST", 4, int),
+        max_queue=read_setting("GEMINI_MAX_QUEUE", 64, int),
+        max_retries=read_setting("GEMINI_MAX_RETRIES", 3, int),
+        metrics=get_latency_metrics(),
+        breaker=breaker,
+    )
+    return dispatcher
+
+
+# ----------------------------
+# 🤖 AI Response Generation
+# ----------------------------
+CHAT_PROMPT_TEMPLATE = """
+                    You are ReliefMate AI, a disaster relief assistant for Gujarat, India.
+                    Provide helpful, actionable advice in 100-150 words.
+                    Include relevant emergency contacts when appropriate.
+                    Be empathetic, clear, and focus on immediate safety.
+                    {context}
+                    User Question: {question}
+                    """
+
+CONTEXT_BLOCK_TEMPLATE = """
+                    Conversation so far (use it to resolve follow-up questions):
+                    {memory}
+                    """
+
+# Curated offline guidance served in demo mode and whenever the model is unavailable
+EMERGENCY_KNOWLEDGE_BASE = [
+    {
+        "topic": "general",
+        "keywords": "emergency danger help urgent evacuation evacuate police ambulance safe route trapped disaster",
+        "answer": "🚨 **Emergency Protocol**: For immediate danger, call 112 (Police), 108 (Ambulance), or 101 (Fire). Stay calm, move to safety, and follow official evacuation routes. Keep emergency kit ready with water, food, medicine, and important documents.",
+    },
+    {
+        "topic": "flood",
+        "keywords": "flood flooding water rising rain river overflow drown submerged roof boat monsoon inundation",
+        "answer": "🌊 **Flood Safety**: Move to higher ground immediately. Never walk or drive through flood water. Stay informed via official radio/TV channels. If trapped, signal for help from highest available point. Emergency services: 108 for rescue operations.",
+    },
+    {
+        "topic": "fire",
+        "keywords": "fire smoke burn burning flame blaze gas leak explosion building extinguisher",
+        "answer": "🔥 **Fire Emergency**: GET OUT, STAY OUT, CALL 101. Crawl low under smoke. Close doors behind you. Meet at designated family meeting spot. Don't use elevators. If clothes catch fire: Stop, Drop, Roll.",
+    },
+    {
+        "topic": "medical",
+        "keywords": "medical injury injured bleeding blood wound hurt unconscious breathing pulse heart attack fracture first aid doctor hospital ambulance",
+        "answer": "🏥 **Medical Emergency**: Call 108 immediately. Check for breathing and pulse. Apply pressure to bleeding wounds. Keep victim warm and conscious. Don't move someone with potential spinal injury unless in immediate danger.",
+    },
+    {
+        "topic": "cyclone",
+        "keywords": "cyclone storm wind hurricane gale coast coastal surge tide landfall warning shutters",
+        "answer": "🌀 **Cyclone Safety**: Follow IMD warnings and evacuate coastal or low-lying areas when told. Shelter in a strong building away from windows, switch off power and gas, and store drinking water. Stay indoors until officials confirm the storm has passed — the calm eye is not the end. Rescue: 108, Police: 112.",
+    },
+    {
+        "topic": "earthquake",
+        "keywords": "earthquake quake tremor aftershock shaking collapse rubble debris building crack",
+        "answer": "🌍 **Earthquake Safety**: DROP, COVER and HOLD ON under sturdy furniture; stay away from windows and heavy objects. Outdoors, move to open ground away from buildings and power lines. After shaking stops, expect aftershocks, check for gas leaks and injuries, and avoid damaged structures. Rescue: 108, Fire: 101.",
+    },
+    {
+        "topic": "kit",
+        "keywords": "kit emergency supplies prepare preparedness pack bag food water flashlight radio documents cash charger medicine stock",
+        "answer": "📋 **Emergency Kit**: Include water (1 gallon per person per day), non-perishable food, flashlight, radio, first aid kit, medications, documents, cash, and phone chargers. Update kit every 6 months.",
+    },
+]
+
+DEMO_RESPONSES = [entry["answer"] for entry in EMERGENCY_KNOWLEDGE_BASE]
+
+
+class KnowledgeBaseIndex:
+    # TF-IDF over the curated guidance; document vectors are built once and a
+    # lookup is a single sparse-query dot product against a small matrix
+    def __init__(self, entries, default_topic="general"):
+        self.entries = entries
+        documents = [normalize_query(f"{e['topic']} {e['keywords']} {e.get('answer', '')}") for e in entries]
+        vocabulary = sorted({token for doc in documents for token in doc})
+        self.vocabulary = {token: i for i, token in enumerate(vocabulary)}
+        counts = np.zeros((len(documents), len(vocabulary)), dtype=np.float32)
+        for row, doc in enumerate(documents):
+            for token in doc:
+                counts[row, self.vocabulary[token]] += 1.0
+        document_frequency = np.count_nonzero(counts, axis=0)
+        self.idf = np.log((1 + len(documents)) / (1 + document_frequency)).astype(np.float32) + 1.0
+        vectors = (1.0 + np.log1p(counts)) * (counts > 0) * self.idf
+        self.matrix = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        self.default_index = next(i for i, e in enumerate(entries) if e["topic"] == default_topic)
+
+    def search(self, question):
+        columns = [self.vocabulary[t] for t in normalize_query(question) if t in self.vocabulary]
+        if not columns:
+            return self.entries[self.default_index], 0.0
+        columns = np.array(columns)
+        unique, counts = np.unique(columns, return_counts=True)
+        weights = (1.0 + np.log1p(counts)) * self.idf[unique]
+        scores = self.matrix[:, unique] @ weights / np.linalg.norm(weights)
+        best = int(np.argmax(scores))
+        return self.entries[best], float(scores[best])
+
+
+@st.cache_resource(show_spinner=False)
+def get_knowledge_base_index():
+    return KnowledgeBaseIndex(EMERGENCY_KNOWLEDGE_BASE)
+
+
+def offline_answer(question):
+    entry, _score = get_knowledge_base_index().search(question)
+    return entry["answer"]
+
+
+def build_chat_prompt(user_input, context=""):
+    block = CONTEXT_BLOCK_TEMPLATE.format(memory=context) if context else ""
+    return CHAT_PROMPT_TEMPLATE.format(question=user_input, context=block)
+
+
+def estimate_tokens(text):
+    # Rough rule of thumb for Gemini tokenisation of English text
+    return max(1, len(text) // 4)
+
+
+# Shown above the offline answer when the model is skipped. Kept apart from
+# the answer so the answer's pre-warmed translation is a cache hit, and
+# written out per language because no model is available to translate it
+OFFLINE_NOTICES = {
+    "circuit": {
+        None: "⚡ **The AI service is temporarily unavailable** — answering straight away from our offline emergency guidance:",
+        "Gujarati": "⚡ **AI સેવા હાલમાં ઉપલબ્ધ નથી** — અમારા ઑફલાઇન કટોકટી માર્ગદર્શનમાંથી તરત જવાબ આપી રહ્યા છીએ:",
+        "Hindi": "⚡ **एआई सेवा अस्थायी रूप से उपलब्ध नहीं है** — हमारे ऑफ़लाइन आपातकालीन मार्गदर्शन से तुरंत जवाब दे रहे हैं:",
+    },
+    "busy": {
+        None: "⏳ **High demand right now** — here is our offline guidance while the assistant catches up:",
+        "Gujarati": "⏳ **હાલમાં માંગ ખૂબ વધારે છે** — સહાયક ઉપલબ્ધ થાય ત્યાં સુધી અમારું ઑફલાઇન માર્ગદર્શન:",
+        "Hindi": "⏳ **इस समय मांग बहुत अधिक है** — सहायक के उपलब्ध होने तक हमारा ऑफ़लाइन मार्गदर्शन:",
+    },
+}
+
+
+def with_offline_notice(text, notice, language=None):
+    if not notice:
+        return text
+    return OFFLINE_NOTICES[notice].get(language, OFFLINE_NOTICES[notice][None]) + "\n\n" + text
+
+
+def service_unavailable_message(error):
+    return f"❌ Service temporarily unavailable. For immediate help: 112 (Police), 108 (Medical), 101 (Fire). Error: {str(error)[:50]}..."
+
+
+@timed("generate_content")
+def generate_blocking(model, prompt):
+    response = model.generate_content(prompt)
+    return response.text.strip()
+
+
+@timed("generate_content_stream")
+def generate_streaming(model, prompt, on_text):
+    # Calls on_text with the accumulated answer after every chunk
+    parts = []
+    for chunk in model.generate_content(prompt, stream=True):
+        try:
+            text = chunk.text
+        except ValueError:
+            # Chunks without text (e.g. safety metadata) carry nothing to render
+            continue
+        if not text:
+            continue
+        parts.append(text)
+        on_text("".join(parts))
+    return "".join(parts).strip()
+
+
+def call_model(model, prompt, stream, emit=None):
+    # Runs on a dispatcher worker; returns the answer and how it was produced
+    if stream and emit is not None:
+        shown = []
+        
+        def relay(text):
+            shown.append(True)
+            emit(text)
+        
+        try:
+            ai_response = generate_streaming(model, prompt, relay)
+            if ai_response:
+                return ai_response, "stream"
+        except Exception:
+            # Nothing was shown yet, so the blocking call is a clean retry
+            if shown:
+                raise
+        return generate_blocking(model, prompt), "blocking (stream fallback)"
+    return generate_blocking(model, prompt), "blocking"
+
+
+@timed("chat_response")
+def generate_ai_response(model, user_input, stream=False, on_text=None, on_state=None, context="", priority="high"):
+    # Returns the answer text plus a latency record for the message; an
+    # offline fallback is returned bare with latency["notice"] naming its banner
+    started = time.perf_counter()
+    latency = {"mode": "demo", "first_token_ms": None, "prompt_tokens": 0, "priority": priority}
+    
+    def first_text(text):
+        if latency["first_token_ms"] is None:
+            latency["first_token_ms"] = round((time.perf_counter() - started) * 1000)
+        on_text(text)
+    
+    if model is None:
+        ai_response = offline_answer(user_input)
+    else:
+        prompt = build_chat_prompt(user_input, context)
+        latency["prompt_tokens"] = estimate_tokens(prompt)
+        client = get_gemini_client()
+        cache = get_response_cache()
+        # Follow-ups only share cached answers with the same conversation context
+        namespace = ResponseCache.namespace(CHAT_PROMPT_TEMPLATE + context, client.model_name)
+        cached = cache.get(user_input, namespace)
+        if cached is not None:
+            latency["mode"] = "cache"
+            latency["total_ms"] = round((time.perf_counter() - started) * 1000)
+            latency["first_token_ms"] = latency["total_ms"]
+            return cached, latency
+        dispatcher = get_model_dispatcher()
+        try:
+            ticket = dispatcher.submit(call_model, model, prompt, stream and on_text is not None,
+                                       key=hashlib.sha256(prompt.encode()).hexdigest(), priority=priority)
+            ai_response, latency["mode"] = dispatcher.wait(ticket, on_text=first_text if on_text else None, on_state=on_state)
+            if ticket.attempts > 1:
+                latency["mode"] += f" after {ticket.attempts - 1} retries"
+            if ticket.waiters > 1:
+                latency["mode"] += f" (shared with {ticket.waiters - 1} other requests)"
+            client.record_success()
+            cache.put(user_input, namespace, ai_response)
+        except dispatcher.CircuitOpen:
+            latency["mode"] = "offline (circuit open)"
+            latency["notice"] = "circuit"
+            ai_response = offline_answer(user_input)
+        except dispatcher.Busy:
+            latency["mode"] = "offline (queue full)"
+            latency["notice"] = "busy"
+            ai_response = offline_answer(user_input)
+        except Exception as e:
+            client.record_failure(e)
+            ai_response = service_unavailable_message(e)
+    latency["total_ms"] = round((time.perf_counter() - started) * 1000)
+    if latency["first_token_ms"] is None:
+        latency["first_token_ms"] = latency["total_ms"]
+    get_latency_metrics().observe("chat_first_token", latency["first_token_ms"])
+    return ai_response, latency
+
+
+# ----------------------------
+# 🏷️ Request Classification
+# ----------------------------
+REQUEST_CATEGORIES = ["medical", "food", "shelter", "rescue", "other"]
+CLASSIFY_BATCH_SIZE = 25
+CLASSIFICATION_CACHE_SIZE = 50000
+
+CATEGORY_KEYWORDS = [
+    {"topic": "medical", "keywords": "medical medicine doctor hospital injury injured bleeding blood wound fever sick ill pregnant insulin dialysis ambulance first aid unconscious fracture burn"},
+    {"topic": "food", "keywords": "food water drinking hungry hunger ration meal milk baby formula grain rice supplies starving thirsty packet"},
+    {"topic": "shelter", "keywords": "shelter roof house home homeless tent blanket camp relief centre center stay sleep collapsed damaged displaced clothes"},
+    {"topic": "rescue", "keywords": "rescue trapped stuck stranded missing drowning boat evacuate evacuation rooftop rising water help urgent life danger debris buried"},
+    {"topic": "other", "keywords": "information update question report"},
+]
+
+CLASSIFY_PROMPT_TEMPLATE = """
+                    You triage citizen requests for a disaster relief team in Gujarat, India.
+                    Classify each numbered message into exactly one of: {categories}.
+                    Reply with only a JSON array of category strings, one per message, in order.
+                    
+                    {messages}
+                    """
+
+
+def classification_key(text):
+    return hashlib.sha256(" ".join(text.lower().split()).encode()).hexdigest()
+
+
+def classify_locally(text, index):
+    entry, score = index.search(text)
+    return entry["topic"] if score > 0 else "other"
+
+
+def classify_batch_with_model(model, texts, emit=None):
+    # One upstream call for the whole batch; runs on a dispatcher worker and
+    # returns the raw reply, which is parsed by the caller so a malformed
+    # answer from a healthy model never counts against the circuit breaker
+    messages = "\n".join(f"{i + 1}. {' '.join(text.split())[:500]}" for i, text in enumerate(texts))
+    prompt = CLASSIFY_PROMPT_TEMPLATE.format(categories=", ".join(REQUEST_CATEGORIES), messages=messages)
+    return generate_blocking(model, prompt)
+
+
+def parse_classification(raw, texts):
+    raw = re.sub(r"^```(?:json)?|```$", "", raw.strip()).strip()
+    labels = json.loads(raw)
+    if not isinstance(labels, list) or len(labels) != len(texts):
+        raise ValueError(f"Expected {len(texts)} labels, got {raw[:80]}")
+    return [label if label in REQUEST_CATEGORIES else "other" for label in (str(label).strip().lower() for label in labels)]
+
+
+class ClassificationCache:
+    def __init__(self, max_entries=CLASSIFICATION_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._labels = collections.OrderedDict()
+
+    def get_many(self, keys):
+        with self._lock:
+            found = {}
+            for key in keys:
+                if key in self._labels:
+                    self._labels.move_to_end(key)
+                    found[key] = self._labels[key]
+            return found
+
+    def put_many(self, labels):
+        with self._lock:
+            self._labels.update(labels)
+            while len(self._labels) > self.max_entries:
+                self._labels.popitem(last=False)
+
+    def __len__(self):
+        return len(self._labels)
+
+
+@st.cache_resource(show_spinner=False)
+def get_classification_cache():
+    return ClassificationCache()
+
+
+@st.cache_resource(show_spinner=False)
+def get_category_index():
+    return KnowledgeBaseIndex(CATEGORY_KEYWORDS, default_topic="other")
+
+
+def classify_requests(texts, model=None, batch_size=CLASSIFY_BATCH_SIZE, priority="normal"):
+    # Cached labels are reused by content hash; the remaining unique texts are
+    # sent to the model in concurrent batches (local classifier when offline
+    # or when a batch fails)
+    started = time.perf_counter()
+    cache = get_classification_cache()
+    keys = [classification_key(text) for text in texts]
+    labels = cache.get_many(set(keys))
+    pending = {}
+    for key, text in zip(keys, texts):
+        if key not in labels:
+            pending.setdefault(key, text)
+    stats = {"count": len(texts), "cached": len(texts) - sum(1 for key in keys if key in pending), "model_batches": 0, "local": 0}
+    
+    fresh = {}
+    pending_keys = list(pending)
+    batches = [pending_keys[i:i + batch_size] for i in range(0, len(pending_keys), batch_size)]
+    tickets = []
+    if model is not None:
+        dispatcher = get_model_dispatcher()
+        for batch in batches:
+            try:
+                tickets.append((batch, dispatcher.submit(classify_batch_with_model, model, [pending[key] for key in batch], priority=priority)))
+            except dispatcher.Busy:
+                tickets.append((batch, None))
+    else:
+        tickets = [(batch, None) for batch in batches]
+    index = get_category_index()
+    for batch, ticket in tickets:
+        try:
+            if ticket is None:
+                raise DispatcherBusy("offline")
+            fresh.update(zip(batch, parse_classification(dispatcher.wait(ticket), batch)))
+            stats["model_batches"] += 1
+        except Exception:
+            for key in batch:
+                fresh[key] = classify_locally(pending[key], index)
+            stats["local"] += len(batch)
+    cache.put_many(fresh)
+    labels.update(fresh)
+    
+    stats["seconds"] = time.perf_counter() - started
+    stats["per_sec"] = len(texts) / stats["seconds"] if stats["seconds"] else 0.0
+    return [labels[key] for key in keys], stats
+
+
+def classify_stored_reports(store, model=None, limit=5000, page_size=500):
+    totals = {"count": 0, "cached": 0, "model_batches": 0, "local": 0, "seconds": 0.0}
+    while totals["count"] < limit:
+        reports = store.uncategorized(min(page_size, limit - totals["count"]))
+        if not reports:
+            break
+        labels, stats = classify_requests([f"{r.type} {r.needs} {r.description}" for r in reports], model, priority="low")
+        store.set_categories(zip((r.id for r in reports), labels))
+        for key in ("count", "cached", "model_batches", "local", "seconds"):
+            totals[key] += stats[key]
+    totals["per_sec"] = totals["count"] / totals["seconds"] if totals["seconds"] else 0.0
+    return totals
+
+
+# ----------------------------
+# 📰 Report Summarization
 # ----------------------------
-def setup_gemini():
-    # Correct way to read from Streamlit secrets
-    try:
-        GEMINI_KEY = st.secrets["general"]["GEMINI_API_KEY"]
-    except (KeyError, FileNotFoundError):
-        GEMINI_KEY = None
-        st.warning("Gemini API key not found in secrets.toml")
-    
-    if GEMINI_KEY and GEMINI_KEY != "your_actual_gemini_api_key_here":
-        try:
-            genai.configure(api_key=GEMINI_KEY)
-            model = genai.GenerativeModel("gemini-1.5-flash")
-            return model, "✅ Gemini AI Connected"
-        except Exception as e:
-            return None, f"❌ API Error: {str(e)[:50]}..."
-    else:
-        return None, "⚠️ Demo Mode (Add real GEMINI_API_KEY to secrets)"
+SUMMARY_CHUNK_CHARS = 12000
+SUMMARY_REDUCE_CHARS = 16000
+EXTRACTIVE_SUMMARY_SENTENCES = 4
+# Unpunctuated text is one giant "sentence"; capping it keeps the fallback shrinking
+EXTRACTIVE_SENTENCE_CHARS = 400
+# When calls fail fast every group falls back to extractive_summary, so the
+# reduce loop is bounded and stops as soon as a pass does not shrink the text
+SUMMARY_MAX_REDUCE_PASSES = 4
+BULLETIN_MIN_CHARS = 800
+
+SUMMARY_MAP_TEMPLATE = """
+                    You are summarising part {part} of {parts} of a disaster field report from Gujarat, India.
+                    List the verified facts only: locations, casualties, needs, hazards, actions taken and contacts.
+                    Use at most 8 short bullet points.
+                    
+                    Report text:
+                    {text}
+                    """
+
+SUMMARY_REDUCE_TEMPLATE = """
+                    You are ReliefMate AI writing a public relief bulletin for Gujarat, India.
+                    Merge the partial summaries below into one bulletin of at most 120 words:
+                    a one-line headline, then the most urgent needs, affected areas and official contacts.
+                    Drop duplicates and anything not stated in the summaries.
+                    
+                    Partial summaries:
+                    {text}
+                    """
+
+
+def split_sentences(text):
+    return [sentence.strip() for sentence in re.split(r"(?<=[.!?])\s+|\n+", text) if sentence.strip()]
+
+
+def chunk_text(text, max_chars=SUMMARY_CHUNK_CHARS):
+    # Packs whole sentences into chunks below the model's comfortable input size
+    chunks, current = [], ""
+    for sentence in split_sentences(text):
+        while len(sentence) > max_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current} {sentence}".strip()
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def extractive_summary(text, sentences=EXTRACTIVE_SUMMARY_SENTENCES):
+    # Offline fallback: keep the sentences whose terms are most frequent across the text
+    candidates = [sentence[:EXTRACTIVE_SENTENCE_CHARS] for sentence in split_sentences(text)]
+    if len(candidates) <= sentences:
+        return " ".join(candidates)
+    tokenized = [normalize_query(sentence) for sentence in candidates]
+    frequency = collections.Counter(token for tokens in tokenized for token in tokens)
+    scores = [sum(frequency[token] for token in tokens) / (1 + len(tokens)) ** 0.5 for tokens in tokenized]
+    keep = sorted(sorted(range(len(candidates)), key=scores.__getitem__, reverse=True)[:sentences])
+    return " ".join(candidates[i] for i in keep)
+
+
+def summarize_with_model(model, prompt, emit=None):
+    return generate_blocking(model, prompt)
+
+
+def map_reduce_summary(text, model, priority="normal"):
+    # Map: every chunk is summarised concurrently through the dispatcher.
+    # Reduce: partial summaries are merged, recursively if they are still too long.
+    stats = {"chunks": 0, "model_calls": 0, "fallbacks": 0}
+    if model is None:
+        stats["chunks"] = len(chunk_text(text))
+        return extractive_summary(text), stats
+    dispatcher = get_model_dispatcher()
+    
+    def run_all(prompts, fallback_texts):
+        tickets = []
+        for prompt in prompts:
+            try:
+                tickets.append(dispatcher.submit(summarize_with_model, model, prompt, key=hashlib.sha256(prompt.encode()).hexdigest(), priority=priority))
+            except dispatcher.Busy:
+                tickets.append(None)
+        results = []
+        for ticket, fallback_text in zip(tickets, fallback_texts):
+            try:
+                if ticket is None:
+                    raise DispatcherBusy("queue full")
+                results.append(dispatcher.wait(ticket))
+                stats["model_calls"] += 1
+            except Exception:
+                results.append(extractive_summary(fallback_text))
+                stats["fallbacks"] += 1
+        return results
+    
+    chunks = chunk_text(text)
+    stats["chunks"] = len(chunks)
+    partials = run_all(
+        [SUMMARY_MAP_TEMPLATE.format(part=i + 1, parts=len(chunks), text=chunk) for i, chunk in enumerate(chunks)],
+        chunks,
+    )
+    for _ in range(SUMMARY_MAX_REDUCE_PASSES):
+        groups = chunk_text("\n".join(partials), SUMMARY_REDUCE_CHARS)
+        merged = run_all([SUMMARY_REDUCE_TEMPLATE.format(text=group) for group in groups], groups)
+        if len(merged) == 1:
+            return merged[0], stats
+        if sum(map(len, merged)) >= sum(map(len, partials)):
+            break
+        partials = merged
+    stats["fallbacks"] += 1
+    return extractive_summary("\n".join(merged)), stats
+
+
+def generate_bulletin(source, text, store, model=None, priority="normal"):
+    # Bulletins are stored per source and content version, so an unchanged
+    # report is never summarised twice
+    started = time.perf_counter()
+    version = hashlib.sha256(f"{source}\n{text}".encode()).hexdigest()
+    bulletin = store.get_bulletin(source, version)
+    stats = {"cached": bulletin is not None, "chunks": 0, "model_calls": 0, "fallbacks": 0}
+    if bulletin is None:
+        bulletin, run_stats = map_reduce_summary(text, model, priority)
+        stats.update(run_stats)
+        store.save_bulletin(source, version, bulletin)
+    stats["seconds"] = time.perf_counter() - started
+    return bulletin, stats
+
 
 # ----------------------------
-# 📊 Sample Data Generation
+# 🌐 Translation
 # ----------------------------
-def generate_sample_data():
-    # Relief Reports
-    reports = [
-        {"location": "Rajkot", "type": "Flood", "status": "🚨 Critical", "needs": "Food, Water, Medical Supplies", "team": "Team A"},
-        {"location": "Ahmedabad", "type": "Earthquake", "status": "✅ Resolved", "needs": "Search & Rescue Complete", "team": "Team B"},
-        {"location": "Surat", "type": "Cyclone", "status": "⚠️ Active", "needs": "Evacuation, Shelter", "team": "Team C"},
-        {"location": "Bhavnagar", "type": "Fire", "status": "🔥 Critical", "needs": "Fire Brigade, Medical Aid", "team": "Team D"},
-        {"location": "Vadodara", "type": "Landslide", "status": "📋 Monitoring", "needs": "Geological Survey", "team": "Team E"}
-    ]
-    
-    # Analytics Data
-    dates = [date.today() - timedelta(days=i) for i in range(7, 0, -1)]
-    analytics = {
-        "dates": dates,
-        "requests": [random.randint(50, 200) for _ in range(7)],
-        "resolved": [random.randint(20, 150) for _ in range(7)],
-        "active": [random.randint(10, 80) for _ in range(7)]
-    }
-    
-    return reports, analytics
+ANSWER_LANGUAGES = {"English": None, "ગુજરાતી (Gujarati)": "Gujarati", "हिन्दी (Hindi)": "Hindi"}
+TRANSLATION_CACHE_SIZE = 5000
+TRANSLATION_PREWARM_TOP = 20
+# Cached answers become worth translating once they have been served this
+# often; the prewarm pass re-ranks them on this interval
+TRANSLATION_PREWARM_MIN_HITS = 3
+TRANSLATION_PREWARM_INTERVAL_SECONDS = 300
+# Shared copies expire so the backend only holds translations still in use
+TRANSLATION_SHARED_TTL_SECONDS = 7 * 24 * 60 * 60
+
+TRANSLATE_PROMPT_TEMPLATE = """
+                    Translate the following emergency guidance into {language}.
+                    Keep phone numbers, numbers and markdown formatting exactly as they are.
+                    Reply with only the translation.
+                    
+                    {text}
+                    """
+
+
+class TranslationCache:
+    # Keyed by (hash of the English text, target language); a shared backend,
+    # when configured, lets one worker's translations serve every worker
+    def __init__(self, max_entries=TRANSLATION_CACHE_SIZE, backend=None, ttl_seconds=TRANSLATION_SHARED_TTL_SECONDS):
+        self.backend = backend
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "prewarmed": 0}
+
+    @staticmethod
+    def key(text, language):
+        return hashlib.sha256(text.encode()).hexdigest(), language
+
+    def _shared(self, key):
+        return self.backend.get("translation", ":".join(key)) if self.backend is not None else None
+
+    def get(self, text, language):
+        key = self.key(text, language)
+        with self._lock:
+            translated = self._entries.get(key)
+            if translated is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return translated
+        translated = self._shared(key)
+        with self._lock:
+            if translated is None:
+                self.stats["misses"] += 1
+                return None
+            self._remember(key, translated)
+            self.stats["hits"] += 1
+            return translated
+
+    def contains(self, text, language):
+        key = self.key(text, language)
+        with self._lock:
+            if key in self._entries:
+                return True
+        return self._shared(key) is not None
+
+    def _remember(self, key, translated):
+        self._entries[key] = translated
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def put(self, text, language, translated):
+        key = self.key(text, language)
+        with self._lock:
+            self._remember(key, translated)
+        if self.backend is not None:
+            self.backend.set("translation", ":".join(key), translated, ttl=self.ttl_seconds)
+
+    def snapshot(self):
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return dict(self.stats, entries=len(self._entries), hit_ratio=self.stats["hits"] / lookups if lookups else 0.0)
+
+
+@st.cache_resource(show_spinner=False)
+def get_translation_cache():
+    return TranslationCache(backend=get_state_backend())
+
+
+def translate_with_model(model, prompt, emit=None):
+    return generate_blocking(model, prompt)
+
+
+def translate_text(text, language, model, priority="high"):
+    # Returns (translated text, how it was served); English passes straight through
+    if not language:
+        return text, "source"
+    cache = get_translation_cache()
+    translated = cache.get(text, language)
+    if translated is not None:
+        return translated, "cache"
+    if model is None:
+        return text, "unavailable"
+    prompt = TRANSLATE_PROMPT_TEMPLATE.format(language=language, text=text)
+    dispatcher = get_model_dispatcher()
+    try:
+        translated = dispatcher.wait(dispatcher.submit(translate_with_model, model, prompt, key=hashlib.sha256(prompt.encode()).hexdigest(), priority=priority))
+    except Exception:
+        return text, "unavailable"
+    cache.put(text, language, translated)
+    return translated, "model"
+
+
+def prewarm_translations(model, texts):
+    cache = get_translation_cache()
+    dispatcher = get_model_dispatcher()
+    for language in (language for language in ANSWER_LANGUAGES.values() if language):
+        for text in texts:
+            if not cache.contains(text, language):
+                # Background work only spends rate-limit headroom that live chats are not using
+                while dispatcher.snapshot()["queued"] or dispatcher.bucket.available() < dispatcher.bucket.capacity / 2:
+                    time.sleep(0.5)
+                translated, served = translate_text(text, language, model, priority="low")
+                if served == "model":
+                    cache.stats["prewarmed"] += 1
+
+
+def prewarm_translations_periodically(model_fingerprint, model):
+    # The response cache is empty at startup, so the hottest answers are
+    # re-ranked every interval; already translated texts are skipped
+    prewarm_translations(model, DEMO_RESPONSES)
+    while get_gemini_client().fingerprint == model_fingerprint:
+        time.sleep(TRANSLATION_PREWARM_INTERVAL_SECONDS)
+        prewarm_translations(model, get_response_cache().top_responses(TRANSLATION_PREWARM_TOP, TRANSLATION_PREWARM_MIN_HITS))
+
+
+@st.cache_resource(show_spinner=False)
+def schedule_translation_prewarm(model_fingerprint, _model):
+    # One background worker per configured model translates the offline
+    # answers, then the most-served cached answers, ahead of demand. It
+    # stops once the model is replaced.
+    worker = threading.Thread(target=prewarm_translations_periodically, args=(model_fingerprint, _model),
+                              name="translation-prewarm", daemon=True)
+    worker.start()
+    return worker
+
 
 # ----------------------------
-# 🏠 Hero Section
+# 🗂️ Conversation Memory
 # ----------------------------
-def render_hero():
-    st.markdown("""
-    <div class="hero-container">
-        <div style="display: flex; justify-content: space-between; align-items: center; flex-wrap: wrap;">
-            <div>
-                <h1 class="hero-title">
-                    <span style="font-size: 1.8rem;">🌍</span> ReliefMate AI
-                </h1>
-                <p class="hero-subtitle">Advanced Disaster Relief Management System</p>
-                <span class="status-badge">System Operational</span>
-            </div>
-        </div>
-        <div class="emergency-info" style="margin-top: 16px;">
-            <strong style="color: #fbbf24;">Emergency Hotlines:</strong>
-            <span style="color: #e5e7eb; margin-left: 16px;">
-                Police: 112  |  Medical: 108  |  Fire: 101
-            </span>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+MEMORY_WINDOW_MESSAGES = 6
+MEMORY_TURN_CHARS = 400
+MEMORY_SUMMARY_CHARS = 600
+MEMORY_SESSION_CHARS = 4000
+MEMORY_MAX_SESSIONS = 5000
+MEMORY_IDLE_SECONDS = 2 * 60 * 60
+CHAT_HISTORY_LIMIT = 20
+
+
+def summarize_turn(role, text):
+    # Older turns are reduced to their first sentence so the summary keeps the
+    # thread of the conversation at a fraction of the tokens
+    plain = re.sub(r"[*_`#]+", "", text).strip()
+    first = re.split(r"(?<=[.!?])\s", plain, maxsplit=1)[0][:120]
+    return f"{'User asked' if role == 'user' else 'Assistant advised'}: {first}"
+
+
+class ConversationMemory:
+    # Per-session sliding window of recent turns plus a compact summary of
+    # everything older; sessions are LRU-evicted and expire when idle. With a
+    # shared backend the stored copy is authoritative and local is a cache.
+    def __init__(self, window=MEMORY_WINDOW_MESSAGES, turn_chars=MEMORY_TURN_CHARS, summary_chars=MEMORY_SUMMARY_CHARS,
+                 session_chars=MEMORY_SESSION_CHARS, max_sessions=MEMORY_MAX_SESSIONS, idle_seconds=MEMORY_IDLE_SECONDS,
+                 backend=None):
+        self.backend = backend
+        self.window = window
+        self.turn_chars = turn_chars
+        self.summary_chars = summary_chars
+        self.session_chars = session_chars
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self._lock = threading.Lock()
+        self._sessions = collections.OrderedDict()
+        self.stats = {"summarized_turns": 0, "evicted_sessions": 0}
+
+    def _session(self, session_id):
+        now = time.time()
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = {"turns": collections.deque(), "summary": [], "touched": now}
+            self._sessions[session_id] = session
+        session["touched"] = now
+        self._sessions.move_to_end(session_id)
+        while self._sessions:
+            oldest_id, oldest = next(iter(self._sessions.items()))
+            if len(self._sessions) <= self.max_sessions and now - oldest["touched"] <= self.idle_seconds:
+                break
+            del self._sessions[oldest_id]
+            self.stats["evicted_sessions"] += 1
+        return session
+
+    # Backend reads and writes happen outside self._lock so a slow Redis or
+    # SQLite call never stalls other sessions; only the local merge is locked
+    def _fetch(self, session_id):
+        # Another worker may have answered the previous turn
+        return self.backend.get("memory", session_id) if self.backend is not None else None
+
+    def _merge(self, session_id, stored):
+        if stored is not None:
+            self._sessions[session_id] = {
+                "turns": collections.deque(tuple(turn) for turn in stored["turns"]),
+                "summary": list(stored["summary"]),
+                "touched": stored["touched"],
+            }
+
+    @staticmethod
+    def _payload(session):
+        return {"turns": list(session["turns"]), "summary": list(session["summary"]), "touched": session["touched"]}
+
+    def _store(self, session_id, payload):
+        if self.backend is not None:
+            self.backend.set("memory", session_id, payload, ttl=self.idle_seconds)
+
+    @staticmethod
+    def _size(session):
+        return sum(len(text) for _, text in session["turns"]) + sum(len(line) for line in session["summary"])
+
+    def record(self, session_id, role, text):
+        stored = self._fetch(session_id)
+        with self._lock:
+            self._merge(session_id, stored)
+            session = self._session(session_id)
+            session["turns"].append((role, text[:self.turn_chars]))
+            while session["turns"] and (len(session["turns"]) > self.window or self._size(session) > self.session_chars):
+                old_role, old_text = session["turns"].popleft()
+                session["summary"].append(summarize_turn(old_role, old_text))
+                self.stats["summarized_turns"] += 1
+            while session["summary"] and sum(len(line) + 1 for line in session["summary"]) > self.summary_chars:
+                session["summary"].pop(0)
+            payload = self._payload(session)
+        self._store(session_id, payload)
+
+    def context(self, session_id):
+        stored = self._fetch(session_id)
+        with self._lock:
+            self._merge(session_id, stored)
+            session = self._sessions.get(session_id)
+            if session is None:
+                return ""
+            lines = []
+            if session["summary"]:
+                lines.append("Earlier: " + " ".join(session["summary"]))
+            lines.extend(f"{'User' if role == 'user' else 'Assistant'}: {text}" for role, text in session["turns"])
+            return "\n".join(lines)
+
+    def forget(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+        if self.backend is not None:
+            self.backend.delete("memory", session_id)
+
+    def snapshot(self):
+        with self._lock:
+            sizes = [self._size(session) for session in self._sessions.values()]
+            return dict(self.stats, sessions=len(sizes), total_chars=sum(sizes), max_session_chars=max(sizes, default=0))
+
+
+@st.cache_resource(show_spinner=False)
+def get_conversation_memory():
+    return ConversationMemory(backend=get_state_backend())
+
+
+# Streamlit's XSRF cookie is set once per browser and sent to every worker,
+# so it ties a conversation link to the browser that started it
+BROWSER_COOKIE = "_streamlit_xsrf"
+
+
+@st.cache_resource(show_spinner=False)
+def get_session_secret():
+    # STATE_SECRET if configured, otherwise one random secret agreed through
+    # the shared backend so every worker can verify every link
+    secret = read_setting("STATE_SECRET")
+    if secret:
+        return secret.encode()
+    backend = get_state_backend()
+    generated = secrets.token_hex(32)
+    return (backend.setdefault("config", "session-secret", generated) if backend is not None else generated).encode()
+
+
+def browser_key():
+    try:
+        cookie = st.context.cookies.get(BROWSER_COOKIE)
+    except Exception:
+        return None
+    return cookie if isinstance(cookie, str) and cookie else None
+
+
+def session_token(sid):
+    key = browser_key()
+    if not key:
+        return None
+    signature = hmac.new(get_session_secret(), f"{sid}|{key}".encode(), hashlib.sha256).hexdigest()[:32]
+    return f"{sid}.{signature}"
+
+
+def verified_session(token):
+    # Accepts a ?sid= link only in the browser it was issued to: a shared,
+    # bookmarked-elsewhere or logged link starts a fresh conversation instead
+    sid, _, _ = token.partition(".")
+    if not re.fullmatch(r"[0-9a-f]{32}", sid):
+        return None
+    expected = session_token(sid)
+    return sid if expected and hmac.compare_digest(expected, token) else None
+
+
+def conversation_id():
+    # With a shared backend a signed id is also kept in the URL, so a browser
+    # that reconnects to another worker resumes the same conversation
+    if "conversation_id" not in st.session_state:
+        st.session_state.conversation_id = verified_session(st.query_params.get("sid", "")) or uuid.uuid4().hex
+    if get_state_backend() is not None:
+        token = session_token(st.session_state.conversation_id)
+        if token and st.query_params.get("sid") != token:
+            st.query_params["sid"] = token
+    return st.session_state.conversation_id
+
+
+def load_chat_history():
+    backend = get_state_backend()
+    stored = backend.get("chat", conversation_id()) if backend is not None else None
+    return stored or []
+
+
+def save_chat_history(history):
+    backend = get_state_backend()
+    if backend is not None:
+        backend.set("chat", conversation_id(), history, ttl=MEMORY_IDLE_SECONDS)
+
 
 # ----------------------------
 # 💬 Enhanced Chat Interface
 # ----------------------------
+USER_MESSAGE_TEMPLATE = '<div class="chat-message from-user"><strong class="speaker-user">You:</strong><br><span class="message-body">{content}</span></div>'
+ASSISTANT_MESSAGE_TEMPLATE = '<div class="chat-message from-assistant"><strong class="speaker-assistant">ReliefMate AI:</strong><br><span class="message-body">{content}</span>{footer}</div>'
+LATENCY_FOOTER_TEMPLATE = '<br><span class="message-meta">⏱ First token {first_token_ms} ms • Total {total_ms} ms • {mode} • ~{prompt_tokens} prompt tokens</span>'
+
+
+def chat_message_html(message):
+    if message["role"] == "user":
+        return USER_MESSAGE_TEMPLATE.format(content=html.escape(message["content"]))
+    latency = message.get("latency")
+    footer = LATENCY_FOOTER_TEMPLATE.format(**{"prompt_tokens": 0, **latency}) if latency else ""
+    return ASSISTANT_MESSAGE_TEMPLATE.format(content=message["content"], footer=footer)
+
+
+@st.fragment
+@timed("render_chat_interface")
 def render_chat_interface(model, api_status):
+    # A fragment: sending a message reruns only the chat, not the whole page
     st.markdown("## AI Assistant")
     st.markdown('<p style="color: #64748b; margin-bottom: 32px;">Get instant guidance on emergency procedures, resource allocation, and disaster response protocols</p>', unsafe_allow_html=True)
     
     # Initialize chat history
     if "chat_history" not in st.session_state:
-        st.session_state.chat_history = []
+        st.session_state.chat_history = load_chat_history()
     
     # System Ready indicator
     st.markdown("""
@@ -408,63 +3120,80 @@ def render_chat_interface(model, api_status):
     with col2:
         send_button = st.button("Send", use_container_width=True)
     
+    scol1, scol2 = st.columns([1, 1])
+    with scol1:
+        stream_responses = st.toggle("Stream responses", value=True, key="stream_responses", help="Show the answer as it is generated")
+    with scol2:
+        answer_language = ANSWER_LANGUAGES[st.selectbox("Answer language", list(ANSWER_LANGUAGES), key="answer_language", label_visibility="collapsed")]
+    cache_stats = get_response_cache().snapshot()
+    translation_stats = get_translation_cache().snapshot()
+    st.caption(f"Response cache: {cache_stats['entries']} answers • {cache_stats['hit_ratio']:.0%} hit rate ({cache_stats['hits']} hits / {cache_stats['misses']} misses) • Translations: {translation_stats['entries']} cached, {translation_stats['hit_ratio']:.0%} hit rate")
+    queue_stats = get_model_dispatcher().snapshot()
+    st.caption(f"Model queue: {queue_stats['queued']} waiting • {queue_stats['in_flight']}/{queue_stats['max_in_flight']} in flight • avg wait {queue_stats['avg_queue_wait_ms']} ms • {queue_stats['retries']} retries • {queue_stats['coalesced']} coalesced")
+    
     st.markdown('</div>', unsafe_allow_html=True)
     
-    # Process message
+    # Queue the message; the answer is generated in place inside the history below
+    pending = None
     if send_button and user_input.strip():
-        # Add user message to history
         st.session_state.chat_history.append({"role": "user", "content": user_input})
-        
-        # Generate AI response
-        if model:
-            with st.spinner("🤖 ReliefMate AI is analyzing..."):
-                try:
-                    enhanced_prompt = f"""
-                    You are ReliefMate AI, a disaster relief assistant for Gujarat, India.
-                    Provide helpful, actionable advice in 100-150 words.
-                    Include relevant emergency contacts when appropriate.
-                    Be empathetic, clear, and focus on immediate safety.
-                    
-                    User Question: {user_input}
-                    """
-                    response = model.generate_content(enhanced_prompt)
-                    ai_response = response.text.strip()
-                except Exception as e:
-                    ai_response = f"❌ Service temporarily unavailable. For immediate help: 112 (Police), 108 (Medical), 101 (Fire). Error: {str(e)[:50]}..."
-        else:
-            # Demo responses for when API is not available
-            demo_responses = [
-                "🚨 **Emergency Protocol**: For immediate danger, call 112 (Police), 108 (Ambulance), or 101 (Fire). Stay calm, move to safety, and follow official evacuation routes. Keep emergency kit ready with water, food, medicine, and important documents.",
-                "🌊 **Flood Safety**: Move to higher ground immediately. Never walk or drive through flood water. Stay informed via official radio/TV channels. If trapped, signal for help from highest available point. Emergency services: 108 for rescue operations.",
-                "🔥 **Fire Emergency**: GET OUT, STAY OUT, CALL 101. Crawl low under smoke. Close doors behind you. Meet at designated family meeting spot. Don't use elevators. If clothes catch fire: Stop, Drop, Roll.",
-                "🏥 **Medical Emergency**: Call 108 immediately. Check for breathing and pulse. Apply pressure to bleeding wounds. Keep victim warm and conscious. Don't move someone with potential spinal injury unless in immediate danger.",
-                "📋 **Emergency Kit**: Include water (1 gallon per person per day), non-perishable food, flashlight, radio, first aid kit, medications, documents, cash, and phone chargers. Update kit every 6 months."
-            ]
-            ai_response = random.choice(demo_responses)
-        
-        # Add AI response to history
-        st.session_state.chat_history.append({"role": "assistant", "content": ai_response})
+        pending = {"role": "assistant", "content": "", "question": user_input}
+        st.session_state.chat_history.append(pending)
+        del st.session_state.chat_history[:-CHAT_HISTORY_LIMIT]
     
     # Display chat history
     if st.session_state.chat_history:
         st.markdown('<div style="max-width: 900px; margin: 24px auto;">', unsafe_allow_html=True)
         st.markdown("### Conversation History")
+        live_slot = None
         for message in reversed(st.session_state.chat_history[-10:]):  # Show last 10 messages
-            if message["role"] == "user":
-                st.markdown(f"""
-                <div class="chat-message" style="border-left: 3px solid #dc2626; background: #fef2f2;">
-                    <strong style="color: #dc2626;">You:</strong><br>
-                    <span style="color: #334155;">{message["content"]}</span>
-                </div>
-                """, unsafe_allow_html=True)
+            if message is pending:
+                live_slot = st.empty()
+                live_slot.markdown(chat_message_html({"role": "assistant", "content": "🤖 ReliefMate AI is analyzing..."}), unsafe_allow_html=True)
             else:
-                st.markdown(f"""
-                <div class="chat-message" style="border-left: 3px solid #06b6d4; background: #ecfeff;">
-                    <strong style="color: #0891b2;">ReliefMate AI:</strong><br>
-                    <span style="color: #334155;">{message["content"]}</span>
-                </div>
-                """, unsafe_allow_html=True)
+                st.markdown(chat_message_html(message), unsafe_allow_html=True)
         st.markdown('</div>', unsafe_allow_html=True)
+        
+        if pending is not None:
+            def show_partial(text):
+                live_slot.markdown(chat_message_html({"role": "assistant", "content": text + " ▌"}), unsafe_allow_html=True)
+            
+            def show_state(state, position):
+                if state == "queued" and priority == "critical":
+                    status = "🚨 Marked life-threatening — your question goes to the front of the line. If you can, call 112 now."
+                elif state == "queued":
+                    status = f"⏳ Queued — position {position} in line. Your question will be answered shortly." if position else "⏳ Queued..."
+                elif state == "retrying":
+                    status = "🔁 The AI service is busy, retrying..."
+                elif state == "translating":
+                    status = "🌐 Translating..."
+                else:
+                    status = "🤖 ReliefMate AI is analyzing..."
+                live_slot.markdown(chat_message_html({"role": "assistant", "content": status}), unsafe_allow_html=True)
+            
+            question = pending.pop("question")
+            priority = request_priority(question)
+            memory = get_conversation_memory()
+            ai_response, latency = generate_ai_response(
+                model, question, stream=stream_responses, on_text=show_partial, on_state=show_state,
+                context=memory.context(conversation_id()), priority=priority,
+            )
+            if not ai_response.startswith("❌"):
+                memory.record(conversation_id(), "user", question)
+                memory.record(conversation_id(), "assistant", ai_response)
+            if answer_language:
+                show_state("translating", 0)
+                translate_started = time.perf_counter()
+                ai_response, served = translate_text(ai_response, answer_language, model, priority)
+                latency["total_ms"] += round((time.perf_counter() - translate_started) * 1000)
+                latency["mode"] += f" • {answer_language} ({served})"
+            ai_response = with_offline_notice(ai_response, latency.get("notice"), answer_language)
+            store = get_report_store()
+            ai_response += nearby_facilities_note(question, get_facility_locator(store.facility_version(), store))
+            pending["content"] = ai_response
+            pending["latency"] = latency
+            save_chat_history(st.session_state.chat_history)
+            live_slot.markdown(chat_message_html(pending), unsafe_allow_html=True)
     else:
         st.markdown("""
         <div style="text-align: center; padding: 60px 40px; background: white; border-radius: 10px; margin: 24px auto; max-width: 600px; box-shadow: 0 1px 3px rgba(0, 0, 0, 0.08);">
@@ -477,132 +3206,244 @@ def render_chat_interface(model, api_status):
 # ----------------------------
 # 📊 Relief Reports Dashboard
 # ----------------------------
-def render_reports_dashboard(reports):
+DISASTER_ICONS = {
+    "Flood": "🌊",
+    "Fire": "🔥",
+    "Earthquake": "🌍",
+    "Cyclone": "🌀",
+    "Landslide": "⛰️"
+}
+
+REPORT_PAGE_SIZES = [10, 25, 50]
+
+METRIC_CARD_TEMPLATE = '<div class="metric-container"><div class="metric-value tone-{tone}">{value}</div><div class="metric-label">{label}</div></div>'
+
+
+REPORT_CARD_TEMPLATE = (
+    '<div class="glass-card"><div class="report-card-header"><h3>{icon} {location} • {type}</h3>'
+    '<span class="status-{status_class}">{status}</span></div><div class="report-card-body">'
+    '<p><strong>Requirements:</strong> {needs}</p><p class="report-team"><strong>Team:</strong> {team}</p>'
+    '<p class="report-updated">Updated: {updated} IST</p></div></div>'
+)
+# Asia/Kolkata (ANALYTICS_TIMEZONE) as a fixed offset: it has no DST
+IST = datetime.timezone(datetime.timedelta(hours=5, minutes=30), "IST")
+
+
+def ist_today():
+    return datetime.datetime.now(IST).date()
+
+
+def _report_card_markup(location, disaster_type, status, needs, team, updated_at, today):
+    # today is part of the cache key so a card gains its date once it is not from today
+    updated = datetime.datetime.fromtimestamp(updated_at, IST)
+    return REPORT_CARD_TEMPLATE.format(
+        icon=DISASTER_ICONS.get(disaster_type, "⚠️"),
+        location=html.escape(location),
+        type=html.escape(disaster_type),
+        status_class=status.lower() if status in REPORT_STATUSES else "monitoring",
+        status=html.escape(status),
+        needs=html.escape(needs),
+        team=html.escape(team),
+        updated=updated.strftime('%H:%M' if updated.date() == today else '%d %b %Y, %H:%M'),
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def get_report_card_renderer():
+    # Module globals are rebuilt on every rerun, so the LRU is held here to
+    # reuse unchanged cards across reruns and sessions; it is keyed on the
+    # rendered fields
+    return functools.lru_cache(maxsize=4096)(_report_card_markup)
+
+
+def report_card_html(report, today=None):
+    return get_report_card_renderer()(report.location, report.type, report.status, report.needs or report.description,
+                                      report.team, report.updated_at, today or ist_today())
+
+
+@timed("render_reports_dashboard")
+def render_reports_dashboard(store):
     st.markdown("## Live Relief Operations")
     st.markdown('<p style="color: #64748b; margin-bottom: 32px;">Real-time monitoring of active disaster response operations</p>', unsafe_allow_html=True)
     
-    # Status summary
+    # Filters
+    fcol1, fcol2, fcol3 = st.columns(3)
+    with fcol1:
+        status_filter = st.selectbox("Status", ["All"] + REPORT_STATUSES, key="reports_status")
+    with fcol2:
+        type_filter = st.selectbox("Disaster Type", ["All"] + store.distinct("type"), key="reports_type")
+    with fcol3:
+        location_filter = st.selectbox("Location", ["All"] + store.distinct("location"), key="reports_location")
+    filters = {
+        "status": None if status_filter == "All" else status_filter,
+        "disaster_type": None if type_filter == "All" else type_filter,
+        "location": None if location_filter == "All" else location_filter,
+    }
+    
+    if get_feed_ingestor() is not None:
+        render_live_reports_polling(store, filters)
+    else:
+        render_live_reports(store, filters)
+    render_nearby_facilities(store)
+
+
+@st.fragment(run_every=FEED_REFRESH_SECONDS)
+def render_live_reports_polling(store, filters):
+    # Only used while a feed ingestor is running: reruns on its own timer so
+    # feed updates appear without a full page rerun
+    render_live_reports(store, filters)
+
+
+@timed("render_live_reports")
+def render_live_reports(store, filters):
+    # Counters are O(1) lookups and card markup is memoised
+    ingestor = get_feed_ingestor()
+    if ingestor is not None:
+        feed = ingestor.snapshot()
+        last_poll = datetime.datetime.fromtimestamp(feed["last_poll"]).strftime("%H:%M:%S") if feed["last_poll"] else "pending"
+        st.caption(
+            f"📡 Live feed: {', '.join(feed['sources'])} • last poll {last_poll} • "
+            f"{feed['inserted']} new, {feed['updated']} updated, {feed['duplicates']} duplicates skipped"
+            + ("" if feed["leader"] else " • polled by another worker")
+            + (f" • ⚠️ {feed['last_error']}" if feed["errors"] else "")
+        )
+    
+    # Status summary - one grouped query for all four counters
     col1, col2, col3, col4 = st.columns(4)
     
-    critical_count = len([r for r in reports if "Critical" in r["status"]])
-    active_count = len([r for r in reports if "Active" in r["status"]])
-    resolved_count = len([r for r in reports if "Resolved" in r["status"]])
-    monitoring_count = len([r for r in reports if "Monitoring" in r["status"]])
+    status_counts = store.status_counts(filters["disaster_type"], filters["location"])
+    critical_count = status_counts.get("Critical", 0)
+    active_count = status_counts.get("Active", 0)
+    resolved_count = status_counts.get("Resolved", 0)
+    monitoring_count = status_counts.get("Monitoring", 0)
     
     with col1:
-        st.markdown("""
-        <div class="metric-container">
-            <div class="metric-value" style="color: #dc2626;">{}</div>
-            <div class="metric-label">Critical Cases</div>
-        </div>
-        """.format(critical_count), unsafe_allow_html=True)
+        st.markdown(METRIC_CARD_TEMPLATE.format(tone="critical", value=critical_count, label="Critical Cases"), unsafe_allow_html=True)
     
     with col2:
-        st.markdown("""
-        <div class="metric-container">
-            <div class="metric-value" style="color: #d97706;">{}</div>
-            <div class="metric-label">Active Operations</div>
-        </div>
-        """.format(active_count), unsafe_allow_html=True)
+        st.markdown(METRIC_CARD_TEMPLATE.format(tone="active", value=active_count, label="Active Operations"), unsafe_allow_html=True)
     
     with col3:
-        st.markdown("""
-        <div class="metric-container">
-            <div class="metric-value" style="color: #059669;">{}</div>
-            <div class="metric-label">Resolved Cases</div>
-        </div>
-        """.format(resolved_count), unsafe_allow_html=True)
+        st.markdown(METRIC_CARD_TEMPLATE.format(tone="resolved", value=resolved_count, label="Resolved Cases"), unsafe_allow_html=True)
     
     with col4:
-        st.markdown("""
-        <div class="metric-container">
-            <div class="metric-value" style="color: #2563eb;">{}</div>
-            <div class="metric-label">Under Monitoring</div>
-        </div>
-        """.format(monitoring_count), unsafe_allow_html=True)
+        st.markdown(METRIC_CARD_TEMPLATE.format(tone="monitoring", value=monitoring_count, label="Under Monitoring"), unsafe_allow_html=True)
     
-    # Detailed reports
+    # Detailed reports - only the current page is queried and rendered
     st.markdown("### Operations Report")
-    st.markdown("")  # spacing
-    
-    for i, report in enumerate(reports):
-        # Determine status styling
-        if "Critical" in report["status"]:
-            status_bg = "#fef2f2"
-            status_color = "#dc2626"
-            status_border = "#fecaca"
-            icon = "🚨"
-        elif "Active" in report["status"]:
-            status_bg = "#fef3c7"
-            status_color = "#d97706"
-            status_border = "#fde68a"
-            icon = "⚠️"
-        elif "Resolved" in report["status"]:
-            status_bg = "#ecfdf5"
-            status_color = "#059669"
-            status_border = "#a7f3d0"
-            icon = "✅"
-        else:  # Monitoring
-            status_bg = "#eff6ff"
-            status_color = "#2563eb"
-            status_border = "#bfdbfe"
-            icon = "📋"
-        
-        disaster_icons = {
-            "Flood": "🌊",
-            "Fire": "🔥",
-            "Earthquake": "🌍",
-            "Cyclone": "🌀",
-            "Landslide": "⛰️"
-        }
-        disaster_icon = disaster_icons.get(report["type"], "⚠️")
-        
-        st.markdown(f"""
-        <div class="glass-card">
-            <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 16px; flex-wrap: wrap; gap: 12px;">
-                <h3 style="color: #0f172a; margin: 0; display: flex; align-items: center; gap: 8px;">
-                    {disaster_icon} {report["location"]} • {report["type"]}
-                </h3>
-                <span style="background: {status_bg}; color: {status_color}; padding: 6px 14px; border-radius: 12px; font-weight: 600; font-size: 0.85rem; border: 1px solid {status_border};">
-                    {report["status"].replace("🚨 ", "").replace("🔥 ", "").replace("⚠️ ", "").replace("✅ ", "").replace("📋 ", "")}
-                </span>
-            </div>
-            <div style="display: flex; flex-direction: column; gap: 8px; color: #475569;">
-                <p style="margin: 0;"><strong style="color: #334155;">Requirements:</strong> {report["needs"]}</p>
-                <p style="margin: 0; color: #64748b;"><strong style="color: #334155;">Team:</strong> {report["team"]}</p>
-                <p style="margin: 0; color: #94a3b8; font-size: 0.85rem;">Updated: {datetime.datetime.now().strftime('%H:%M')} IST</p>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
+    
+    if filters["status"]:
+        total = status_counts.get(filters["status"], 0)
+    else:
+        total = sum(status_counts.values())
+    pcol1, pcol2, pcol3 = st.columns([1, 1, 2])
+    with pcol1:
+        page_size = st.selectbox("Per page", REPORT_PAGE_SIZES, key="reports_page_size")
+    page_count = max(1, math.ceil(total / page_size))
+    with pcol2:
+        page = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1, key="reports_page")
+    page = min(page, page_count)
+    first = (page - 1) * page_size
+    with pcol3:
+        st.markdown(f'<p style="color: #64748b; margin-top: 36px;">Showing {min(first + 1, total)}–{min(first + page_size, total)} of {total} reports</p>', unsafe_allow_html=True)
+    
+    reports = store.query(**filters, page=page, page_size=page_size)
+    if reports:
+        # One element per card: on a timed refresh the browser only repaints
+        # the cards whose markup actually changed
+        today = ist_today()
+        for report in reports:
+            st.markdown(report_card_html(report, today), unsafe_allow_html=True)
+    else:
+        st.info("No reports match the selected filters.")
+
+
+@timed("render_nearby_facilities")
+def render_nearby_facilities(store):
+    st.markdown("### Nearby Facilities")
+    ncol1, ncol2, ncol3 = st.columns(3)
+    with ncol1:
+        city = st.selectbox("Near", list(CITY_COORDINATES), key="nearby_city")
+    with ncol2:
+        kind_label = st.selectbox("Facility", ["Any"] + list(FACILITY_KINDS.values()), key="nearby_kind")
+    with ncol3:
+        radius_km = st.slider("Radius (km)", 5, 200, 25, step=5, key="nearby_radius")
+    kind = next((kind for kind, label in FACILITY_KINDS.items() if label == kind_label), None)
+    lat, lon = CITY_COORDINATES[city]
+    
+    started = time.perf_counter()
+    nearest = get_facility_locator(store.facility_version(), store).nearest(lat, lon, kind=kind, k=5, max_km=radius_km)
+    reports_frame, report_index = get_report_locator(store.data_version(), store)
+    report_indices, _distances = report_index.within(lat, lon, radius_km)
+    lookup_ms = (time.perf_counter() - started) * 1000
+    
+    if nearest:
+        st.dataframe(pd.DataFrame({
+            "Facility": [facility.name for facility, _ in nearest],
+            "Type": [FACILITY_KINDS.get(facility.kind, facility.kind) for facility, _ in nearest],
+            "Distance (km)": [round(distance, 1) for _, distance in nearest],
+            "Capacity": [facility.capacity for facility, _ in nearest],
+        }), use_container_width=True, hide_index=True)
+    else:
+        st.info(f"No open facilities within {radius_km} km of {city}.")
+    nearby_reports = reports_frame.iloc[report_indices]
+    st.caption(f"{len(nearby_reports):,} open reports within {radius_km} km • {lookup_ms:.1f} ms spatial lookup")
+    if len(nearby_reports) or nearest:
+        points = pd.concat([
+            pd.DataFrame({"lat": [f.latitude for f, _ in nearest], "lon": [f.longitude for f, _ in nearest], "color": "#0891b2"}),
+            pd.DataFrame({"lat": nearby_reports["latitude"].head(2000), "lon": nearby_reports["longitude"].head(2000), "color": "#dc2626"}),
+        ], ignore_index=True)
+        st.map(points, latitude="lat", longitude="lon", color="color", size=60)
 
 # ----------------------------
 # 📈 Analytics Dashboard
 # ----------------------------
-def render_analytics(analytics_data):
+def format_minutes(minutes):
+    if minutes is None:
+        return "—"
+    if minutes < 60:
+        return f"{minutes:.1f} min"
+    return f"{minutes / 60:.1f} h"
+
+
+def metric_delta(current, previous, unit=""):
+    if current is None or previous is None:
+        return None
+    difference = current - previous
+    if isinstance(difference, float):
+        return f"{difference:+.1f}{unit}"
+    return f"{difference:+d}{unit}"
+
+
+@timed("render_analytics")
+def render_analytics(store):
     st.markdown("## Performance Analytics")
     st.markdown('<p style="color: #64748b; margin-bottom: 32px;">Data-driven insights for operational efficiency</p>', unsafe_allow_html=True)
     
-    # Create DataFrame
-    df = pd.DataFrame({
-        'Date': analytics_data['dates'],
-        'New Requests': analytics_data['requests'],
-        'Resolved Cases': analytics_data['resolved'],
-        'Active Cases': analytics_data['active']
-    })
+    window_label = st.selectbox("Time window", list(ANALYTICS_WINDOWS), key="analytics_window")
+    days = ANALYTICS_WINDOWS[window_label]
+    analytics = analytics_for_window(days, store)
+    live = counter_analytics(store, days)
+    current, previous = {**analytics["current"], **live["current"]}, analytics["previous"]
     
     # Charts with better styling
-    st.markdown("### 7-Day Operations Trend")
+    st.markdown(f"### {days}-Day Operations Trend")
     st.markdown('<div style="background: white; padding: 24px; border-radius: 10px; box-shadow: 0 1px 3px rgba(0, 0, 0, 0.08); margin-bottom: 32px;">', unsafe_allow_html=True)
     
     # Line chart using Streamlit
-    chart_data = df.set_index('Date')[['New Requests', 'Resolved Cases', 'Active Cases']]
+    chart_data = live["daily"]
     st.line_chart(chart_data, use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
     
     # Bar chart for comparison
     st.markdown("### Daily Comparison")
     st.markdown('<div style="background: white; padding: 24px; border-radius: 10px; box-shadow: 0 1px 3px rgba(0, 0, 0, 0.08); margin-bottom: 32px;">', unsafe_allow_html=True)
-    st.bar_chart(chart_data, use_container_width=True)
+    st.bar_chart(chart_data[["New Requests", "Resolved Cases"]], use_container_width=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    st.markdown("### Requests by Hour of Day")
+    st.markdown('<div style="background: white; padding: 24px; border-radius: 10px; box-shadow: 0 1px 3px rgba(0, 0, 0, 0.08); margin-bottom: 32px;">', unsafe_allow_html=True)
+    st.bar_chart(analytics["hourly"], use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
     
     # Summary statistics
@@ -610,7 +3451,7 @@ def render_analytics(analytics_data):
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        avg_requests = sum(analytics_data['requests']) // 7
+        avg_requests = current["new"] // days
         st.markdown(f"""
         <div class="glass-card" style="text-align: center;">
             <div style="font-size: 2rem; margin-bottom: 8px;">📈</div>
@@ -620,7 +3461,7 @@ def render_analytics(analytics_data):
         """, unsafe_allow_html=True)
     
     with col2:
-        total_resolved = sum(analytics_data['resolved'])
+        total_resolved = current["resolved"]
         st.markdown(f"""
         <div class="glass-card" style="text-align: center;">
             <div style="font-size: 2rem; margin-bottom: 8px;">✅</div>
@@ -630,7 +3471,7 @@ def render_analytics(analytics_data):
         """, unsafe_allow_html=True)
     
     with col3:
-        resolution_rate = round((total_resolved / sum(analytics_data['requests'])) * 100, 1)
+        resolution_rate = current["resolution_rate"]
         st.markdown(f"""
         <div class="glass-card" style="text-align: center;">
             <div style="font-size: 2rem; margin-bottom: 8px;">🎯</div>
@@ -639,7 +3480,7 @@ def render_analytics(analytics_data):
         </div>
         """, unsafe_allow_html=True)
     
-    # Additional metrics using Streamlit metrics
+    # Additional metrics using Streamlit metrics, compared with the previous window
     st.markdown("### Key Indicators")
     
     col1, col2, col3, col4 = st.columns(4)
@@ -647,36 +3488,41 @@ def render_analytics(analytics_data):
     with col1:
         st.metric(
             label="Critical Cases",
-            value="23",
-            delta="-5",
+            value=current["critical_open"],
+            delta=metric_delta(current["critical_open"], previous["critical_open"]),
             delta_color="inverse"
         )
     
     with col2:
         st.metric(
-            label="Avg Response Time",
-            value="2.3 min",
-            delta="-0.8 min",
-            delta_color="inverse"
+            label="Median Response Time",
+            value=format_minutes(current["response_p50"]),
+            delta=metric_delta(current["response_p50"], previous["response_p50"], " min"),
+            delta_color="inverse",
+            help=f"p90 {format_minutes(current['response_p90'])} • p95 {format_minutes(current['response_p95'])}"
         )
     
     with col3:
         st.metric(
-            label="Active Teams",
-            value="12",
-            delta="+2"
+            label="Backlog",
+            value=current["backlog"],
+            delta=metric_delta(current["backlog"], previous["backlog"]),
+            delta_color="inverse"
         )
     
     with col4:
         st.metric(
             label="Coverage Areas",
-            value="45",
-            delta="+3"
+            value=current["locations"],
+            delta=metric_delta(current["locations"], previous["locations"])
         )
+    
+    st.caption(f"Response time percentiles: p50 {format_minutes(current['response_p50'])} • p90 {format_minutes(current['response_p90'])} • p95 {format_minutes(current['response_p95'])} • {current['teams']} teams on open cases")
 
 # ----------------------------
 # 🛠️ Admin Panel
 # ----------------------------
+@timed("render_admin_panel")
 def render_admin_panel():
     st.markdown("## Administration Panel")
     st.markdown('<p style="color: #64748b; margin-bottom: 32px;">Manage relief operations and system configuration</p>', unsafe_allow_html=True)
@@ -696,7 +3542,13 @@ def render_admin_panel():
         description = st.text_area("Description", placeholder="Describe the situation and required assistance...", height=120)
         
         if st.button("Submit Report", use_container_width=True):
-            st.success(f"✅ Report submitted successfully! Location: {location}, Type: {disaster_type}, Severity: {severity}")
+            priority = request_priority(description, severity)
+            labels, _stats = classify_requests([f"{disaster_type} {description}"], get_gemini_client().model, priority=priority)
+            report_id = get_report_store().add(Report(location=location, type=disaster_type, status=severity, description=description.strip(), category=labels[0]))
+            st.success(f"✅ Report #{report_id} submitted successfully! Location: {location}, Type: {disaster_type}, Severity: {severity}, Category: {labels[0]}")
+            if len(description) > BULLETIN_MIN_CHARS:
+                bulletin, _stats = generate_bulletin(f"report:{report_id}", description, get_report_store(), get_gemini_client().model, priority)
+                st.info(f"📰 **Bulletin:** {bulletin}")
             st.balloons()
     
     with col2:
@@ -721,93 +3573,229 @@ def render_admin_panel():
         )
         
         if uploaded_file is not None:
-            try:
-                df = pd.read_csv(uploaded_file)
-                st.success(f"✅ File uploaded successfully! {len(df)} records found.")
-                st.dataframe(df, use_container_width=True)
-            except Exception as e:
-                st.error(f"❌ Error processing file: {str(e)}")
+            imports = st.session_state.setdefault("csv_imports", {})
+            result = imports.get(uploaded_file.file_id)
+            if result is None:
+                st.caption(f"{uploaded_file.name} • {uploaded_file.size / 1_048_576:.1f} MB • required columns: {', '.join(CSV_REQUIRED_COLUMNS)}")
+                if st.button("Import into report store", use_container_width=True):
+                    progress = st.progress(0.0, text="Importing...")
+                    try:
+                        uploaded_file.seek(0)
+                        result = ingest_reports_csv(
+                            uploaded_file,
+                            get_report_store(),
+                            on_progress=lambda fraction, rows: progress.progress(fraction, text=f"Imported {rows:,} rows..."),
+                        )
+                        imports[uploaded_file.file_id] = result
+                    except Exception as e:
+                        st.error(f"❌ Error processing file: {str(e)}")
+                    progress.empty()
+            if result is not None:
+                st.success(f"✅ Imported {result['rows_imported']:,} of {result['rows_read']:,} records in {result['seconds']:.1f}s ({result['rows_per_sec']:,.0f} rows/sec).")
+                if result["bad_count"]:
+                    st.warning(f"⚠️ {result['bad_count']:,} rows were skipped. First {len(result['bad_rows'])} shown below.")
+                    st.dataframe(pd.DataFrame(result["bad_rows"]), use_container_width=True)
+                if result["preview"] is not None and len(result["preview"]):
+                    st.caption(f"Preview (first {len(result['preview'])} imported rows)")
+                    st.dataframe(result["preview"], use_container_width=True)
+    
+    # Request Triage Section
+    st.markdown("### Request Triage")
+    triage_text = st.text_area(
+        "Citizen requests",
+        placeholder="Paste incoming messages, one per line...",
+        height=120,
+        key="triage_text",
+    )
+    tcol1, tcol2 = st.columns(2)
+    with tcol1:
+        classify_pasted = st.button("Classify Messages", use_container_width=True)
+    with tcol2:
+        classify_stored = st.button("Classify Uncategorised Reports", use_container_width=True)
+    
+    model = get_gemini_client().model
+    if classify_pasted and triage_text.strip():
+        messages = [line.strip() for line in triage_text.splitlines() if line.strip()]
+        labels, stats = classify_requests(messages, model)
+        st.dataframe(pd.DataFrame({"Message": messages, "Category": labels}), use_container_width=True)
+        st.caption(f"Classified {stats['count']} messages in {stats['seconds']:.2f}s ({stats['per_sec']:,.0f} requests/sec) • {stats['cached']} cached • {stats['model_batches']} model batches • {stats['local']} local")
+    if classify_stored:
+        with st.spinner("Classifying stored reports..."):
+            stats = classify_stored_reports(get_report_store(), model)
+        st.success(f"✅ Classified {stats['count']:,} reports in {stats['seconds']:.2f}s ({stats['per_sec']:,.0f} requests/sec) • {stats['cached']:,} cached • {stats['model_batches']} model batches • {stats['local']:,} local")
+    
+    # Relief Bulletins Section
+    st.markdown("### Relief Bulletins")
+    bulletin_file = st.file_uploader(
+        "Upload a long report to summarise",
+        type=["txt", "md", "csv"],
+        help="Plain-text field reports, or a CSV whose description/needs columns are summarised",
+        key="bulletin_file",
+    )
+    if st.button("Generate Bulletin", use_container_width=True):
+        if bulletin_file is not None:
+            source = f"upload:{bulletin_file.name}"
+            if bulletin_file.name.lower().endswith(".csv"):
+                frame = pd.read_csv(bulletin_file, dtype=str, keep_default_na=False,
+                                    usecols=lambda column: normalize_csv_column(column) in ("description", "needs"))
+                text = "\n".join(". ".join(value for value in row if value) for row in frame.itertuples(index=False))
+            else:
+                text = bulletin_file.getvalue().decode("utf-8", errors="replace")
+        else:
+            source, text = "draft:description", description
+        if text.strip():
+            with st.spinner("Summarising report..."):
+                bulletin, stats = generate_bulletin(source, text, get_report_store(), get_gemini_client().model)
+            st.info(f"📰 **Bulletin:** {bulletin}")
+            if stats["cached"]:
+                st.caption(f"Served from the bulletin store in {stats['seconds'] * 1000:.0f} ms (report unchanged)")
+            else:
+                st.caption(f"{stats['chunks']} chunks • {stats['model_calls']} model calls • {stats['fallbacks']} offline fallbacks • {stats['seconds']:.1f}s")
+        else:
+            st.warning("Upload a report or enter a description first.")
     
     # System Status Section
     st.markdown("### System Status")
     
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.markdown("""
-        <div class="glass-card" style="text-align: center;">
-            <div style="font-size: 2rem; margin-bottom: 8px;">🟢</div>
-            <p style="margin: 0; font-weight: 600; color: #059669;">Operational</p>
-            <p style="margin: 0; font-size: 0.85rem; color: #64748b;">System Status</p>
-        </div>
-        """, unsafe_allow_html=True)
+    bcol1, bcol2 = st.columns(2)
+    with bcol1:
+        if st.button("🔄 Reconnect AI Service", help="Rebuild the shared Gemini client, e.g. after rotating the API key"):
+            get_gemini_client().invalidate()
+            st.rerun()
+    with bcol2:
+        if st.button("🧮 Rebuild Dashboard Counters", help="Recompute the materialised report counters and report any drift"):
+            drift = get_report_store().rebuild_counters()
+            if drift:
+                st.warning(f"⚠️ Corrected {len(drift)} drifted counters.")
+            else:
+                st.success("✅ Counters are consistent with the report store.")
     
-    with col2:
-        st.markdown("""
-        <div class="glass-card" style="text-align: center;">
-            <div style="font-size: 2rem; margin-bottom: 8px;">🟢</div>
-            <p style="margin: 0; font-weight: 600; color: #059669;">Connected</p>
-            <p style="margin: 0; font-size: 0.85rem; color: #64748b;">API Status</p>
-        </div>
-        """, unsafe_allow_html=True)
+    render_system_status()
+
+
+STATUS_CARD_TEMPLATE = """
+<div class="glass-card" style="text-align: center;">
+    <div style="font-size: 2rem; margin-bottom: 8px;">{icon}</div>
+    <p style="margin: 0; font-weight: 600; color: {color};">{value}</p>
+    <p style="margin: 0; font-size: 0.85rem; color: #64748b;">{label}</p>
+</div>
+"""
+STATUS_COLORS = {"ok": ("🟢", "#059669"), "warn": ("🟠", "#d97706"), "down": ("🔴", "#dc2626")}
+RESPONSE_TIME_TARGET_MS = 2000
+
+
+def format_ms(ms):
+    return f"{ms / 1000:.1f}s" if ms >= 1000 else f"{ms:.0f}ms"
+
+
+def status_card(tone, value, label, icon=None):
+    default_icon, color = STATUS_COLORS[tone]
+    return STATUS_CARD_TEMPLATE.format(icon=icon or default_icon, color=color, value=html.escape(str(value)), label=label)
+
+
+@st.fragment(run_every=5)
+def render_system_status():
+    # Live figures from the shared client, dispatcher, store and stage timers
+    client = get_gemini_client()
+    dispatcher = get_model_dispatcher().snapshot()
+    metrics = get_latency_metrics()
+    stages = metrics.snapshot()
+    
+    breaker = get_model_dispatcher().breaker
+    if client.model is None:
+        api_card = status_card("warn", "Demo Mode", "API Status")
+    elif breaker.state != "closed":
+        api_card = status_card("down", f"Circuit {breaker.state}", "API Status")
+    elif client.healthy:
+        api_card = status_card("ok", "Connected", "API Status")
+    else:
+        api_card = status_card("down", f"{client.failures} failures", "API Status")
     
-    with col3:
-        st.markdown("""
-        <div class="glass-card" style="text-align: center;">
-            <div style="font-size: 2rem; margin-bottom: 8px;">🟢</div>
-            <p style="margin: 0; font-weight: 600; color: #059669;">Online</p>
-            <p style="margin: 0; font-size: 0.85rem; color: #64748b;">Database</p>
-        </div>
-        """, unsafe_allow_html=True)
+    queue_tone = "ok" if dispatcher["queued"] == 0 else "warn"
+    queue_card = status_card(queue_tone, f"{dispatcher['in_flight']}/{dispatcher['max_in_flight']} busy, {dispatcher['queued']} queued", "Model Queue")
     
-    with col4:
-        st.markdown("""
-        <div class="glass-card" style="text-align: center;">
-            <div style="font-size: 2rem; margin-bottom: 8px;">⚡</div>
-            <p style="margin: 0; font-weight: 600; color: #0ea5e9;">&lt;2s</p>
-            <p style="margin: 0; font-size: 0.85rem; color: #64748b;">Response Time</p>
-        </div>
-        """, unsafe_allow_html=True)
+    try:
+        database_card = status_card("ok", f"{get_report_store().total()} reports", "Database")
+    except sqlite3.Error:
+        database_card = status_card("down", "Unavailable", "Database")
+    
+    response = stages.get("chat_response")
+    if response:
+        p95 = response["p95_ms"]
+        response_card = status_card("ok" if p95 <= RESPONSE_TIME_TARGET_MS else "warn", f"p95 {format_ms(p95)}", "Response Time", icon="⚡")
+    else:
+        response_card = status_card("ok", "No requests yet", "Response Time", icon="⚡")
+    
+    for column, card in zip(st.columns(4), (api_card, queue_card, database_card, response_card)):
+        with column:
+            st.markdown(card, unsafe_allow_html=True)
+    
+    st.markdown("#### Model Queue by Priority")
+    st.dataframe(
+        pd.DataFrame.from_dict(dispatcher["classes"], orient="index")[["queued", "submitted", "started", "avg_queue_wait_ms"]].rename_axis("class"),
+        use_container_width=True,
+    )
+    
+    st.markdown("#### Stage Latency")
+    if stages:
+        st.dataframe(
+            pd.DataFrame.from_dict(stages, orient="index").rename_axis("stage"),
+            use_container_width=True,
+        )
+    else:
+        st.caption("No stages timed yet.")
+    export_note = f"Exported every {METRICS_EXPORT_SECONDS}s to {metrics.export_path}" if metrics.export_path else "File export disabled"
+    st.caption(f"{export_note} • Prometheus text format")
+    st.download_button("⬇️ Download metrics", metrics.prometheus_text(), file_name="reliefmate_metrics.prom", mime="text/plain")
+
 
 # ----------------------------
 # 🚀 Main Application
 # ----------------------------
+@timed("rerun")
 def main():
     # Inject custom CSS
     inject_custom_css()
     
     # Setup Gemini
+    get_latency_metrics().start_export(read_setting("METRICS_FILE", DEFAULT_METRICS_FILE), read_setting("METRICS_EXPORT_SECONDS", METRICS_EXPORT_SECONDS, float))
     model, api_status = setup_gemini()
-    
-    # Generate sample data
-    reports, analytics_data = generate_sample_data()
+    get_feed_ingestor()
+    if model is not None and read_setting("TRANSLATION_PREWARM", 1, int):
+        schedule_translation_prewarm(get_gemini_client().fingerprint, model)
     
     # Hero Section
     render_hero()
     
-    # Status indicator
+    # Status indicator, including the model circuit breaker when it is not closed
+    breaker = get_model_dispatcher().breaker
+    if model is not None and breaker.state == "open":
+        api_status = f"⚡ AI paused after errors — instant offline guidance active (next check in {breaker.retry_in()}s)"
+    elif model is not None and breaker.state == "half-open":
+        api_status = "🩺 Checking AI service recovery — offline guidance active"
     st.markdown(f"""
     <div style="text-align: center; margin: 24px 0 32px 0;">
         <span style="background: rgba(255, 255, 255, 0.98); padding: 8px 20px; border-radius: 8px; border: 1px solid #e2e8f0; color: #475569; box-shadow: 0 1px 2px rgba(0, 0, 0, 0.08); font-size: 0.9rem;">
-            API Status: {api_status}
+            API Status: {html.escape(api_status)}
         </span>
     </div>
     """, unsafe_allow_html=True)
     
-    # Main Navigation Tabs
-    tab1, tab2, tab3, tab4 = st.tabs(["AI Assistant", "Relief Reports", "Analytics", "Admin Panel"])
-    
-    with tab1:
-        render_chat_interface(model, api_status)
-    
-    with tab2:
-        render_reports_dashboard(reports)
-    
-    with tab3:
-        render_analytics(analytics_data)
-    
-    with tab4:
-        render_admin_panel()
+    # Main navigation: unlike st.tabs, only the selected view runs on a rerun.
+    # The choice is mirrored in the URL so links and reconnects keep it.
+    views = {
+        "AI Assistant": lambda: render_chat_interface(model, api_status),
+        "Relief Reports": lambda: render_reports_dashboard(get_report_store()),
+        "Analytics": lambda: render_analytics(get_report_store()),
+        "Admin Panel": render_admin_panel,
+    }
+    slugs = {name: name.lower().replace(" ", "-") for name in views}
+    requested = next((name for name, slug in slugs.items() if slug == st.query_params.get("view")), None)
+    view = st.radio("View", list(views), index=list(views).index(requested) if requested else 0,
+                    horizontal=True, key="view", label_visibility="collapsed")
+    if st.query_params.get("view") != slugs[view]:
+        st.query_params["view"] = slugs[view]
+    views[view]()
     
     # Footer
     st.markdown("""
@@ -819,4 +3807,20 @@ def main():
     """, unsafe_allow_html=True)
 
 if __name__ == "__main__":
-    main()
+    if sys.argv[1:2] == ["build-assets"]:
+        build_theme_assets()
+        print(f"Wrote {THEME_MINIFIED}")
+    elif sys.argv[1:2] == ["rebuild-aggregates"]:
+        # python app.py rebuild-aggregates: offline consistency check of the counters
+        drift = ReportStore(read_setting("REPORTS_DB_PATH", DEFAULT_REPORTS_DB)).rebuild_counters()
+        for (dimension, key), (before, after) in sorted(drift.items()):
+            print(f"{dimension}\t{key}\t{before} -> {after}")
+        print(f"{len(drift)} counters corrected")
+    elif sys.argv[1:2] == ["simulate-feed"]:
+        # python app.py simulate-feed feed.jsonl [count] [interval]
+        simulate_feed(sys.argv[2], *(cast(arg) for cast, arg in zip((int, float), sys.argv[3:])))
+    elif sys.argv[1:2] == ["serve-feed"]:
+        # python app.py serve-feed feed.jsonl [port]
+        serve_feed(sys.argv[2], *(int(arg) for arg in sys.argv[3:4]))
+    else:
+        main()
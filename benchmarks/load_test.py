@@ -0,0 +1,289 @@
+# Headless load test for the Streamlit app.
+#
+#   python benchmarks/load_test.py --sessions 8 --reports 20000   # exits 1 if a budget is exceeded
+#
+# Runs main() and each render_* view through Streamlit's AppTest against a
+# temporary report store, with a stub Gemini model that simulates latency and
+# errors, and prints rerun times, memory per session and chat throughput.
+# Everything runs in one process, as on a single server: chat throughput is
+# measured with concurrent users sharing one dispatcher.
+import argparse
+import concurrent.futures
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "app.py")
+sys.path.insert(0, ROOT)
+
+QUESTIONS = [
+    "What should I do during a flood?",
+    "We are trapped on the roof, water is rising",
+    "How do I treat a burn?",
+    "What goes in an emergency kit?",
+    "Earthquake safety steps",
+    "Cyclone warning, how do we prepare?",
+    "Nearest shelter in Surat",
+]
+
+# p95 budgets in milliseconds, with headroom over a laptop run of the defaults
+VIEW_RERUN_BUDGET_MS = 1500
+APP_RERUN_BUDGET_MS = 2500
+CHAT_BUDGET_MS = 5000
+
+# Each view runs as its own tiny script so it can be timed in isolation
+VIEW_SCRIPTS = {
+    "render_hero": "app.render_hero()",
+    "render_chat_interface": "app.render_chat_interface(*app.setup_gemini())",
+    "render_reports_dashboard": "app.render_reports_dashboard(app.get_report_store())",
+    "render_analytics": "app.render_analytics(app.get_report_store())",
+    "render_admin_panel": "app.render_admin_panel()",
+}
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubModel:
+    # Stands in for genai.GenerativeModel: sleeps for a jittered latency and
+    # raises a transient error at the configured rate
+    latency = 0.3
+    jitter = 0.2
+    error_rate = 0.0
+    lock = threading.Lock()
+    calls = 0
+    errors = 0
+
+    def __init__(self, model_name, *args, **kwargs):
+        self.model_name = model_name
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        with StubModel.lock:
+            StubModel.calls += 1
+            failed = random.random() < StubModel.error_rate
+            StubModel.errors += failed
+        delay = max(0.0, random.gauss(StubModel.latency, StubModel.latency * StubModel.jitter))
+        if failed:
+            time.sleep(delay / 2)
+            raise RuntimeError("503 Service Unavailable (simulated)")
+        text = "Move to higher ground and call 108 for rescue. Keep your phone charged. " * 4
+        if not stream:
+            time.sleep(delay)
+            return StubResponse(text)
+        words = text.split(" ")
+
+        def chunks():
+            for word in words:
+                time.sleep(delay / len(words))
+                yield StubResponse(word + " ")
+        return chunks()
+
+
+def install_stub_model(latency, error_rate):
+    import google.generativeai as genai
+    StubModel.latency = latency
+    StubModel.error_rate = error_rate
+    genai.configure = lambda **kwargs: None
+    genai.GenerativeModel = StubModel
+
+
+def seed_reports(path, count):
+    import app
+    store = app.ReportStore(path)
+    rng = random.Random(7)
+    now = time.time()
+    locations = list(app.CITY_COORDINATES)
+    types = list(app.DISASTER_ICONS)
+    batch = []
+    for index in range(count):
+        created = now - rng.uniform(0, 45 * 86400)
+        status = rng.choice(app.REPORT_STATUSES)
+        batch.append(app.Report(
+            location=rng.choice(locations),
+            type=rng.choice(types),
+            status=status,
+            needs=rng.choice(["Food, Water", "Medical Aid", "Shelter", "Evacuation"]),
+            team=f"Team {rng.choice('ABCDE')}",
+            created_at=created,
+            resolved_at=created + rng.uniform(600, 86400) if status == "Resolved" else None,
+        ))
+        if len(batch) == 5000 or index == count - 1:
+            store.bulk_add(batch)
+            batch = []
+    return store
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))] if ordered else 0.0
+
+
+def summarize(samples_ms):
+    return {
+        "runs": len(samples_ms),
+        "p50_ms": round(percentile(samples_ms, 50), 1),
+        "p95_ms": round(percentile(samples_ms, 95), 1),
+        "max_ms": round(max(samples_ms), 1) if samples_ms else 0.0,
+    }
+
+
+def timed_run(at):
+    started = time.perf_counter()
+    at.run()
+    elapsed = (time.perf_counter() - started) * 1000
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return elapsed
+
+
+def bench_views(reruns, timeout):
+    from streamlit.testing.v1 import AppTest
+    results = {}
+    for view, call in VIEW_SCRIPTS.items():
+        at = AppTest.from_string(f"import app\napp.inject_custom_css()\n{call}\n", default_timeout=timeout)
+        timed_run(at)  # warm caches and imports
+        results[view] = summarize([timed_run(at) for _ in range(reruns)])
+    return results
+
+
+def bench_sessions(sessions, reruns, timeout):
+    # AppTest is not thread-safe, so the sessions share one process and their
+    # script runs take turns, like one server handling several browser tabs
+    from streamlit.testing.v1 import AppTest
+    apps = [AppTest.from_file(APP_PATH, default_timeout=timeout) for _ in range(sessions)]
+    first_runs = [timed_run(at) for at in apps]
+    rerun_samples = [timed_run(at) for _ in range(reruns) for at in apps]
+
+    # Memory per session is what one more session adds once imports and the
+    # shared caches are warm; tracemalloc stays off while anything is timed
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.take_snapshot()
+    extra = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    extra.run()
+    gc.collect()
+    grown = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(baseline, "filename"))
+    tracemalloc.stop()
+    return {
+        "first_run": summarize(first_runs),
+        "rerun": summarize(rerun_samples),
+        "memory_per_session_kb": round(grown / 1024, 1),
+    }
+
+
+def bench_chat(chats, concurrency):
+    # Concurrent chat turns in one process, so they contend for the shared
+    # dispatcher, token bucket, response cache and request coalescing
+    import app
+    model, _ = app.setup_gemini()
+    rng = random.Random(7)
+    questions = [rng.choice(QUESTIONS) for _ in range(chats)]
+
+    def chat(question):
+        started = time.perf_counter()
+        _, latency = app.generate_ai_response(model, question, stream=True, on_text=lambda text: None,
+                                              priority=app.request_priority(question))
+        return (time.perf_counter() - started) * 1000, latency["mode"].split(" ")[0]
+
+    calls_before, errors_before = StubModel.calls, StubModel.errors
+    started = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(chat, questions))
+    elapsed = time.perf_counter() - started
+    modes = {}
+    for _, mode in results:
+        modes[mode] = modes.get(mode, 0) + 1
+    return {
+        "chat": summarize([sample for sample, _ in results]),
+        "chat_throughput_per_sec": round(chats / elapsed, 2) if elapsed else 0.0,
+        "served_by": modes,
+        "model_calls": StubModel.calls - calls_before,
+        "model_errors": StubModel.errors - errors_before,
+    }
+
+
+def check_budgets(results, view_budget_ms, rerun_budget_ms, chat_budget_ms):
+    failures = []
+    for view, row in results["views"].items():
+        if row["p95_ms"] > view_budget_ms:
+            failures.append(f"{view} p95 {row['p95_ms']:.0f} ms, over the {view_budget_ms:.0f} ms budget")
+    sessions, chat = results["sessions"], results["chat"]
+    if sessions["rerun"]["p95_ms"] > rerun_budget_ms:
+        failures.append(f"main() rerun p95 {sessions['rerun']['p95_ms']:.0f} ms, over the {rerun_budget_ms:.0f} ms budget")
+    if chat["chat"]["p95_ms"] > chat_budget_ms:
+        failures.append(f"chat p95 {chat['chat']['p95_ms']:.0f} ms, over the {chat_budget_ms:.0f} ms budget")
+    return failures
+
+
+def print_table(title, rows):
+    print(f"\n{title}")
+    print(f"  {'':<28}{'runs':>6}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for name, row in rows.items():
+        print(f"  {name:<28}{row['runs']:>6}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['max_ms']:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless load test for ReliefMate AI")
+    parser.add_argument("--sessions", type=int, default=4, help="browser sessions to simulate")
+    parser.add_argument("--reports", type=int, default=5000, help="reports seeded into the temporary store")
+    parser.add_argument("--reruns", type=int, default=3, help="plain reruns timed per session and per view")
+    parser.add_argument("--chats", type=int, default=20, help="chat messages sent by concurrent users")
+    parser.add_argument("--concurrency", type=int, default=4, help="chat messages in flight at once")
+    parser.add_argument("--latency", type=float, default=0.3, help="mean stub model latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="fraction of model calls that fail")
+    parser.add_argument("--timeout", type=float, default=120, help="per-run AppTest timeout in seconds")
+    parser.add_argument("--view-budget-ms", type=float, default=VIEW_RERUN_BUDGET_MS, help="p95 rerun budget per view")
+    parser.add_argument("--rerun-budget-ms", type=float, default=APP_RERUN_BUDGET_MS, help="p95 rerun budget for main()")
+    parser.add_argument("--chat-budget-ms", type=float, default=CHAT_BUDGET_MS, help="p95 budget per chat message")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="reliefmate-bench-")
+    os.environ["REPORTS_DB_PATH"] = os.path.join(workdir, "bench.db")
+    os.environ["METRICS_FILE"] = os.path.join(workdir, "metrics.prom")
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark-stub-key")
+    # Background translations would add stub calls nobody asked for
+    os.environ["TRANSLATION_PREWARM"] = "0"
+    install_stub_model(args.latency, args.error_rate)
+
+    started = time.perf_counter()
+    seed_reports(os.environ["REPORTS_DB_PATH"], args.reports)
+    print(f"Seeded {args.reports} reports in {time.perf_counter() - started:.1f}s ({workdir})")
+
+    results = {
+        "config": vars(args),
+        "views": bench_views(args.reruns, args.timeout),
+        "sessions": bench_sessions(args.sessions, args.reruns, args.timeout),
+        "chat": bench_chat(args.chats, args.concurrency),
+    }
+    sessions, chat = results["sessions"], results["chat"]
+    print_table("Views (each render_* alone)", results["views"])
+    print_table(f"main() with {args.sessions} sessions", {key: sessions[key] for key in ("first_run", "rerun")})
+    print(f"  memory per additional session: {sessions['memory_per_session_kb']} KiB")
+    print_table(f"Chat with {args.concurrency} concurrent users", {"generate_ai_response": chat["chat"]})
+    served = ", ".join(f"{count} {mode}" for mode, count in sorted(chat["served_by"].items()))
+    print(f"  throughput: {chat['chat_throughput_per_sec']} messages/s (served: {served}; "
+          f"{chat['model_calls']} model calls, {chat['model_errors']} simulated errors)\n")
+    failures = check_budgets(results, args.view_budget_ms, args.rerun_budget_ms, args.chat_budget_ms)
+    results["failures"] = failures
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print("OK")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# Cold-start check for the Streamlit app.
+#
+#   python benchmarks/startup.py            # exits 1 if the budget is exceeded
+#   python benchmarks/startup.py --runs 10 --budget-ms 250
+#
+# Imports app.py in fresh interpreters and times it separately from
+# Streamlit's own import, which the app cannot avoid. Heavy dependencies must
+# stay lazy: importing the app may not load any of HEAVY_MODULES.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Measured at ~170 ms once pandas, numpy and the Gemini SDK became lazy
+# (~1.6 s before); the budget leaves headroom for slower machines
+APP_IMPORT_BUDGET_MS = 350
+HEAVY_MODULES = ["pandas", "numpy", "google.generativeai"]
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import streamlit
+streamlit_done = time.perf_counter()
+sys.path.insert(0, {root!r})
+import app
+app_done = time.perf_counter()
+print(json.dumps({{
+    "streamlit_ms": (streamlit_done - started) * 1000,
+    "app_ms": (app_done - streamlit_done) * 1000,
+    "heavy_loaded": [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+
+def measure_once():
+    env = dict(os.environ, PYTHONWARNINGS="ignore")
+    completed = subprocess.run(
+        [sys.executable, "-c", PROBE.format(root=ROOT, heavy=HEAVY_MODULES)],
+        capture_output=True, text=True, cwd=ROOT, env=env, check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start import budget for ReliefMate AI")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to time")
+    parser.add_argument("--budget-ms", type=float, default=APP_IMPORT_BUDGET_MS, help="median app import budget")
+    args = parser.parse_args()
+
+    runs = [measure_once() for _ in range(args.runs)]
+    app_ms = statistics.median(run["app_ms"] for run in runs)
+    streamlit_ms = statistics.median(run["streamlit_ms"] for run in runs)
+    heavy = sorted({name for run in runs for name in run["heavy_loaded"]})
+
+    print(f"streamlit import: {streamlit_ms:.0f} ms (median of {args.runs})")
+    print(f"app import:       {app_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    failures = []
+    if app_ms > args.budget_ms:
+        failures.append(f"app import took {app_ms:.0f} ms, over the {args.budget_ms:.0f} ms budget")
+    if heavy:
+        failures.append(f"eagerly imported: {', '.join(heavy)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print("OK")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()